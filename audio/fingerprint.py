@@ -0,0 +1,81 @@
+import numpy as np
+import config
+from audio.pcm import to_float32
+
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+NUM_BANDS = 33
+MIN_FREQ = 300.0
+MAX_FREQ = 2000.0
+
+def trim_silence(audio, threshold_dbfs=None, frame_size=HOP_SIZE):
+    threshold_dbfs = config.FINGERPRINT_CONFIG["trim_dbfs"] if threshold_dbfs is None else threshold_dbfs
+    n_frames = len(audio) // frame_size
+    if n_frames == 0:
+        return 0, len(audio)
+
+    frames = to_float32(audio[:n_frames * frame_size]).reshape(n_frames, frame_size)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    loud = np.flatnonzero(20.0 * np.log10(np.maximum(rms, 1e-10)) >= threshold_dbfs)
+    if len(loud) == 0:
+        return 0, 0
+    # Bounds stay on the frame grid so fingerprint frames line up with VAD frames.
+    return int(loud[0] * frame_size), int((loud[-1] + 1) * frame_size)
+
+def _band_edges(sample_rate):
+    freqs = np.fft.rfftfreq(FRAME_SIZE, d=1.0 / sample_rate)
+    edges = np.geomspace(MIN_FREQ, MAX_FREQ, NUM_BANDS + 1)
+    return np.searchsorted(freqs, edges)
+
+def compute_fingerprint(audio, sample_rate=None, block_frames=4096):
+    sample_rate = sample_rate or config.SAMPLE_RATE
+    n_frames = 0 if len(audio) < FRAME_SIZE else 1 + (len(audio) - FRAME_SIZE) // HOP_SIZE
+    if n_frames < 2:
+        return np.zeros(0, dtype=np.uint32)
+
+    edges = _band_edges(sample_rate)
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    energies = np.empty((n_frames, NUM_BANDS), dtype=np.float32)
+
+    for f0 in range(0, n_frames, block_frames):
+        f1 = min(n_frames, f0 + block_frames)
+        block = to_float32(audio[f0 * HOP_SIZE:(f1 - 1) * HOP_SIZE + FRAME_SIZE])
+        frames = np.lib.stride_tricks.sliding_window_view(block, FRAME_SIZE)[::HOP_SIZE]
+        power = np.abs(np.fft.rfft(frames * window, axis=-1)).astype(np.float32) ** 2
+        cumulative = np.cumsum(power, axis=1)
+        band_energy = cumulative[:, edges[1:] - 1] - cumulative[:, edges[:-1] - 1]
+        energies[f0:f1] = np.log10(np.maximum(band_energy, 1e-10))
+
+    # Haitsma-Kalker bits: sign of the band-energy difference, differenced over time.
+    band_diff = energies[:, :-1] - energies[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    weights = (1 << np.arange(NUM_BANDS - 1, dtype=np.uint64)).astype(np.uint64)
+    return (bits.astype(np.uint64) @ weights).astype(np.uint32)
+
+def compute_probes(audio, start_sample=0, end_sample=None, num_probes=None):
+    # Copies are rarely trimmed on our hop grid; fingerprints taken at a few
+    # sub-hop shifts let a query line up with whatever grid the stored copy used.
+    num_probes = num_probes or config.FINGERPRINT_CONFIG["num_probes"]
+    end_sample = len(audio) if end_sample is None else end_sample
+    step = HOP_SIZE // num_probes
+    return [compute_fingerprint(audio[start_sample + i * step:end_sample]) for i in range(num_probes)]
+
+def slice_probes(probes, origin_sample, start_sample, end_sample):
+    step = HOP_SIZE // len(probes)
+    return [fingerprint_slice(probe, origin_sample + i * step, start_sample, end_sample)
+            for i, probe in enumerate(probes)]
+
+def fingerprint_slice(fingerprint, origin_sample, start_sample, end_sample):
+    # Fingerprint j spans origin + j * HOP_SIZE to origin + (j + 1) * HOP_SIZE + FRAME_SIZE.
+    first = max(0, -(-(start_sample - origin_sample) // HOP_SIZE))
+    last = (end_sample - origin_sample - FRAME_SIZE) // HOP_SIZE
+    if last <= first:
+        return np.zeros(0, dtype=np.uint32)
+    return fingerprint[first:last]
+
+def bit_error_rate(a, b):
+    if len(a) == 0:
+        return 1.0
+    diff = np.bitwise_xor(a, b)
+    bit_counts = np.unpackbits(diff.view(np.uint8)).sum()
+    return float(bit_counts) / (len(a) * 32.0)
@@ -1,10 +1,28 @@
-import numpy as np
 import librosa
 import soundfile as sf
 from scipy import signal
 import config
+from audio.pcm import to_storage_dtype
+
+def _read_pcm16(audio_path):
+    # 16 kHz mono files in the storage format are read straight into int16,
+    # without ever holding a float copy of the whole file.
+    try:
+        info = sf.info(str(audio_path))
+    except Exception:
+        return None
+    if info.samplerate != config.SAMPLE_RATE or info.channels != 1:
+        return None
+    audio, _ = sf.read(str(audio_path), dtype='int16')
+    return audio
+
+def load_audio(audio_path, dtype=None):
+    dtype = dtype or config.AUDIO_CONFIG["storage_dtype"]
+    if dtype == "int16":
+        audio = _read_pcm16(audio_path)
+        if audio is not None:
+            return audio
 
-def load_audio(audio_path):
     try:
         audio, sr = librosa.load(str(audio_path), sr=config.SAMPLE_RATE, mono=True)
     except Exception as e:
@@ -16,7 +34,5 @@ def load_audio(audio_path):
                 audio = audio[:, 0]
         except Exception as e2:
             raise Exception(f"Error loading audio: {e}, {e2}")
-    
-    audio = audio.astype(np.float32)
-    return audio
 
+    return to_storage_dtype(audio, dtype)
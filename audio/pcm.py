@@ -0,0 +1,25 @@
+import sys
+import numpy as np
+from pathlib import Path
+import config
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+VAD_DIR = BASE_DIR / "models" / "vad"
+
+if str(VAD_DIR) not in sys.path:
+    sys.path.insert(0, str(VAD_DIR))
+
+# int16 PCM is kept as-is in buffers and only scaled to [-1, 1) where a model needs
+# floats; the conversions live with the VAD so both sides scale samples the same way.
+from src.processor import PCM16_SCALE, pcm16_to_float32 as to_float32, float32_to_pcm16 as to_pcm16
+
+def to_storage_dtype(audio, dtype=None, block_size=1 << 20):
+    dtype = dtype or config.AUDIO_CONFIG["storage_dtype"]
+    if dtype == "int16":
+        if audio.dtype == np.int16:
+            return audio
+        pcm = np.empty(len(audio), dtype=np.int16)
+        for start in range(0, len(audio), block_size):
+            pcm[start:start + block_size] = to_pcm16(audio[start:start + block_size])
+        return pcm
+    return to_float32(audio)
@@ -5,22 +5,29 @@ BASE_DIR = Path(__file__).resolve().parent
 
 SAMPLE_RATE = 16000
 
+MODEL_CACHE_DIR = Path(os.environ.get("FASTER_QURAN_WHISPER_MODEL_DIR", BASE_DIR / "models"))
+
 WHISPER_CONFIG = {
-    "model_dir": BASE_DIR / "models" / "whisper",
+    "model_dir": MODEL_CACHE_DIR / "whisper",
     "device": "cpu",
     "compute_type": "int8",
     "cpu_threads": 4,
+    "num_workers": 1,
 }
 
 VAD_CONFIG = {
-    "model_dir": BASE_DIR / "models" / "vad",
-    "model_path": BASE_DIR / "models" / "vad" / "silero_vad.onnx",
+    "model_dir": MODEL_CACHE_DIR / "vad",
+    "model_path": MODEL_CACHE_DIR / "vad" / "silero_vad.onnx",
     "model_url": "https://huggingface.co/onnx-community/silero-vad/resolve/main/onnx/model.onnx",
+    "model_variant": "default",
+    "session_preset": "default",
+    "cache_optimized_graph": False,
     "chunk_duration_ms": 32,
     "threshold": 0.25,
     "min_speech_duration_ms": 250,
     "min_silence_duration_ms": 400,
     "silence_pad_ms": 500,
+    "energy_gate_dbfs": -60.0,
 }
 
 TRANSCRIBE_CONFIG = {
@@ -37,10 +44,106 @@ TRANSCRIBE_CONFIG = {
     "compression_ratio_threshold": 3.0,
     "log_prob_threshold": -2.0,
     "word_timestamps": False,
+    "precompute_features": False,
+    "feature_block_frames": 3000,
+}
+
+GOVERNOR_CONFIG = {
+    "enabled": False,
+    "start_level": 1,
+    # Ordered from best quality to fastest; the governor never leaves this list.
+    # Level 1 matches TRANSCRIBE_CONFIG, level 0 adds temperature fallback when there is headroom.
+    "levels": [
+        {"beam_size": 5, "best_of": 5, "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0], "pack_seconds": 0},
+        {"beam_size": 5, "best_of": 5, "temperature": 0.0, "pack_seconds": 0},
+        {"beam_size": 3, "best_of": 3, "temperature": 0.0, "pack_seconds": 15},
+        {"beam_size": 1, "best_of": 1, "temperature": 0.0, "pack_seconds": 28},
+    ],
+    "rtf_alpha": 0.3,
+    "rtf_high": 0.9,
+    "rtf_low": 0.5,
+    "queue_high": 8,
+    "queue_low": 1,
+    "step_down_after": 3,
+    "step_up_after": 10,
+    "max_pack_gap_seconds": 1.5,
+    "audit_log": BASE_DIR / "output" / "governor" / "adjustments.jsonl",
+}
+
+MODEL_REGISTRY_CONFIG = {
+    "allow_download": False,
+    "verify_checksums": True,
+    # Required files per model directory, with their sha256 where it is known. A glob
+    # pattern needs at least one match. Files without a hash here are checked against
+    # the model directory's manifest (`python -m models.registry pin <name>` writes it);
+    # a file pinned in neither is only checked for existence.
+    "manifest_name": "SHA256SUMS",
+    "checksums": {
+        "silero_vad": {
+            "silero_vad.onnx": "a4a068cd6cf1ea8355b84327595838ca748ec29a25bc91fc82e6c299ccdc5808",
+        },
+        "whisper": {
+            "model.bin": os.environ.get("FASTER_QURAN_WHISPER_SHA256"),
+            "config.json": None,
+            # CTranslate2 conversions ship vocabulary.json or vocabulary.txt.
+            "vocabulary.*": None,
+        },
+    },
+}
+
+CHECKPOINT_CONFIG = {
+    "enabled": True,
+    "checkpoint_dir": BASE_DIR / "output" / "checkpoints",
+    "vad_interval_seconds": 60,
+    "segment_interval": 1,
+    "keep_completed": False,
+}
+
+ASYNC_CONFIG = {
+    "max_concurrent_streams": 8,
+    "max_in_flight_segments": 2,
+    "vad_workers": 2,
 }
 
 AUDIO_CONFIG = {
     "default_file": BASE_DIR / "sample" / "quran_test_audio.mp3",
     "supported_formats": [".mp3", ".wav", ".m4a", ".aac", ".flac"],
+    # "int16" keeps decoded audio and segment buffers as 16-bit PCM, half the memory
+    # of "float32"; samples are converted to float32 in small blocks where models need them.
+    "storage_dtype": "float32",
+}
+
+
+STORE_CONFIG = {
+    "enabled": True,
+    "store_dir": BASE_DIR / "output" / "store",
+    "shard_max_bytes": 256 * 1024 * 1024,
+    "fsync": True,
 }
 
+FINGERPRINT_CONFIG = {
+    "enabled": True,
+    "index_dir": BASE_DIR / "output" / "fingerprints",
+    "trim_dbfs": -50.0,
+    "num_probes": 4,
+    "index_stride": 2,
+    "min_segment_seconds": 3.0,
+    "max_bit_error_rate": 0.35,
+    "min_coverage": 0.9,
+    "min_segment_coverage": 0.8,
+    "min_votes": 3,
+    "max_candidates": 8,
+    "max_postings_per_key": 256,
+    "merge_every": 5000,
+}
+
+SWEEP_CONFIG = {
+    # "SECTION.key": values; every combination is one sweep point.
+    "grid": {
+        "TRANSCRIBE_CONFIG.beam_size": [1, 5],
+        "WHISPER_CONFIG.compute_type": ["int8", "float32"],
+        "VAD_CONFIG.threshold": [0.25, 0.4],
+    },
+    "jobs": 2,
+    "output_dir": BASE_DIR / "output" / "sweeps",
+}
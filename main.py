@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 import sys
+import time
 from pathlib import Path
 import config
 from models.loader import load_vad_model, load_whisper_model
+from models.registry import ModelRegistryError
 from audio.loader import load_audio
 from vad.processor import extract_speech_segments
 from transcriber.processor import transcribe_segment
+from transcriber.features import compute_log_mel, slice_segment_features
+from transcriber.governor import QualityGovernor
+from storage.result_store import ResultStore, hash_file
+from storage.checkpoint import Checkpoint, new_run_id
+from storage.fingerprint_index import FingerprintIndex
+from audio.fingerprint import HOP_SIZE, trim_silence, compute_probes, slice_probes
 
 BASE_DIR = Path(__file__).resolve().parent
 VAD_DIR = BASE_DIR / "models" / "vad"
@@ -19,13 +27,17 @@ print("="*60)
 print("Faster-Whisper Full Transcription with VAD")
 print("="*60)
 
-print(f"\n📦 Loading models...")
-vad_session = load_vad_model()
-print("✅ VAD model loaded")
-
-print(f"\n📦 Loading Faster-Whisper model from: {config.WHISPER_CONFIG['model_dir']}")
-whisper_model = load_whisper_model()
-print("✅ Faster-Whisper model loaded")
+try:
+    print(f"\n📦 Loading models...")
+    vad_session = load_vad_model()
+    print("✅ VAD model loaded")
+    
+    print(f"\n📦 Loading Faster-Whisper model from: {config.WHISPER_CONFIG['model_dir']}")
+    whisper_model = load_whisper_model()
+    print("✅ Faster-Whisper model loaded")
+except ModelRegistryError as e:
+    print(f"❌ {type(e).__name__}: {e}")
+    sys.exit(1)
 
 audio_file = config.AUDIO_CONFIG["default_file"]
 if len(sys.argv) > 1:
@@ -45,56 +57,212 @@ except Exception as e:
     print(f"❌ Error loading audio: {e}")
     sys.exit(1)
 
+source_hash = None
+if config.STORE_CONFIG["enabled"] or config.CHECKPOINT_CONFIG["enabled"] or config.FINGERPRINT_CONFIG["enabled"]:
+    source_hash = hash_file(audio_file)
+
+checkpoint = None
+run_id = new_run_id()
+if config.CHECKPOINT_CONFIG["enabled"]:
+    checkpoint = Checkpoint.open(source_hash, len(audio))
+    run_id = checkpoint.run_id
+    if checkpoint.vad is not None:
+        print(f"♻️  Found checkpoint with {len(checkpoint.results)} transcribed segments: {checkpoint.path}")
+
+result_store = None
+if config.STORE_CONFIG["enabled"]:
+    result_store = ResultStore()
+
+# Matches are resolved to transcripts through the result store, so reuse needs it enabled.
+fingerprint_index = None
+duplicate_results = []
+if config.FINGERPRINT_CONFIG["enabled"] and result_store is not None:
+    fingerprint_index = FingerprintIndex()
+    trim_start, trim_end = trim_silence(audio)
+    file_probes = compute_probes(audio, trim_start, trim_end)
+    duplicate = fingerprint_index.lookup(file_probes, kind='file')
+    if duplicate is not None:
+        # Reruns with other VAD settings store a second segmentation of the same file;
+        # only the latest run's segments are used, so no text is joined in twice.
+        stored = [record for record in result_store.lookup(duplicate['entry']['source_hash'])
+                  if not record['transcription'].startswith('ERROR')]
+        if stored:
+            latest_run = max(record['run_id'] for record in stored)
+            stored = [record for record in stored if record['run_id'] == latest_run]
+            duplicate_source = stored[0]['source']
+            print(f"🔁 Near-duplicate of {duplicate_source} (bit error rate {duplicate['bit_error_rate']:.3f}, "
+                  f"coverage {duplicate['coverage']:.1%})")
+            # Move the earlier transcripts onto this file's timeline via the trim points and match alignment.
+            shift = (trim_start - duplicate['entry']['trim_start'] - duplicate['offset_frames'] * HOP_SIZE) / config.SAMPLE_RATE
+            duplicate_results = [
+                {**result, 'start_time': result['start_time'] + shift, 'end_time': result['end_time'] + shift}
+                for result in stored
+            ]
+
 vad_state = VADState(sampling_rate=config.SAMPLE_RATE)
-speech_segments = extract_speech_segments(audio, vad_session, vad_state)
+speech_segments = extract_speech_segments(audio, vad_session, vad_state, checkpoint)
 
 if len(speech_segments) == 0:
     print("\n❌ No audio segments to process")
+    if checkpoint is not None:
+        checkpoint.complete()
     sys.exit(0)
 
 print(f"\n{'='*60}")
 print(f"🎤 TRANSCRIBING {len(speech_segments)} SEGMENTS")
 print(f"{'='*60}\n")
 
+store_writer = None
+if result_store is not None:
+    store_writer = result_store.open_writer()
+    print(f"💾 Storing results in: {result_store.store_dir} (source hash {source_hash[:12]})")
+
+log_mel = None
+if config.TRANSCRIBE_CONFIG["precompute_features"]:
+    log_mel = compute_log_mel(audio, whisper_model)
+    print(f"🎛️  Precomputed log-mel features: {log_mel.shape[1]} frames")
+
 results = []
 temp_dir = Path("/tmp/faster_whisper_chunks")
 temp_dir.mkdir(exist_ok=True)
 
+restored_results = checkpoint.results if checkpoint is not None else {}
+
+# A single file has no queue behind it, so here the governor only follows the real-time factor.
+governor = QualityGovernor() if config.GOVERNOR_CONFIG["enabled"] else None
+reused_count = 0
+
+# Each earlier transcript goes to the segment it overlaps most, so small
+# differences in where VAD cuts the two copies do not lose any text.
+duplicate_transcripts = {}
+for result in duplicate_results:
+    overlaps = [
+        min(result['end_time'], segment['end']/config.SAMPLE_RATE) - max(result['start_time'], segment['start']/config.SAMPLE_RATE)
+        for segment in speech_segments
+    ]
+    best = max(range(len(overlaps)), key=overlaps.__getitem__)
+    if overlaps[best] > 0:
+        duplicate_transcripts.setdefault(best + 1, []).append(result['transcription'])
+
 for idx, segment in enumerate(speech_segments, 1):
     print(f"\n[Segment {idx}/{len(speech_segments)}]")
     print(f"   Duration: {segment['duration']:.2f}s")
     print(f"   Time range: {segment['start']/config.SAMPLE_RATE:.2f}s - {segment['end']/config.SAMPLE_RATE:.2f}s")
     
-    try:
-        transcription = transcribe_segment(whisper_model, segment['audio'], idx, temp_dir)
-        
+    if idx in restored_results:
+        results.append(restored_results[idx])
+        print(f"   ♻️  Restored from checkpoint: {restored_results[idx]['transcription']}")
+        continue
+    
+    segment_probes = None
+    reused = None
+    if idx in duplicate_transcripts:
+        reused = (" ".join(duplicate_transcripts[idx]), duplicate_source)
+    elif fingerprint_index is not None:
+        segment_probes = slice_probes(file_probes, trim_start, segment['start'], segment['end'])
+        match = fingerprint_index.lookup(segment_probes, kind='segment',
+                                         min_coverage=config.FINGERPRINT_CONFIG["min_segment_coverage"])
+        if match is not None:
+            entry = match['entry']
+            for record in result_store.lookup_segment(entry['source_hash'], entry['start'], entry['end']):
+                if not record['transcription'].startswith('ERROR'):
+                    reused = (record['transcription'], record['source'])
+                    break
+    
+    if reused is not None:
         results.append({
             'segment': idx,
             'start_time': segment['start']/config.SAMPLE_RATE,
             'end_time': segment['end']/config.SAMPLE_RATE,
             'duration': segment['duration'],
-            'transcription': transcription
+            'transcription': reused[0]
         })
-        print(f"   ✅ Transcription: {transcription}")
-        
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
-        results.append({
-            'segment': idx,
-            'start_time': segment['start']/config.SAMPLE_RATE,
-            'end_time': segment['end']/config.SAMPLE_RATE,
-            'duration': segment['duration'],
-            'transcription': f"ERROR: {str(e)}"
+        reused_count += 1
+        print(f"   🔁 Reused from {reused[1]}: {reused[0]}")
+    else:
+        try:
+            segment_features = None
+            if log_mel is not None:
+                segment_features = slice_segment_features(log_mel, segment['start'], segment['end'])
+            level, options = governor.current() if governor is not None else (None, None)
+            started = time.perf_counter()
+            transcription = transcribe_segment(whisper_model, segment['audio'], idx, temp_dir, segment_features, options)
+            if governor is not None:
+                governor.observe(segment['duration'], time.perf_counter() - started, level=level)
+            
+            results.append({
+                'segment': idx,
+                'start_time': segment['start']/config.SAMPLE_RATE,
+                'end_time': segment['end']/config.SAMPLE_RATE,
+                'duration': segment['duration'],
+                'transcription': transcription
+            })
+            if governor is not None:
+                results[-1]['quality_level'] = level
+            print(f"   ✅ Transcription: {transcription}")
+            
+        except Exception as e:
+            print(f"   ❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append({
+                'segment': idx,
+                'start_time': segment['start']/config.SAMPLE_RATE,
+                'end_time': segment['end']/config.SAMPLE_RATE,
+                'duration': segment['duration'],
+                'transcription': f"ERROR: {str(e)}"
+            })
+    
+    if store_writer is not None:
+        store_writer.append(source_hash, segment['start'], segment['end'], {
+            **results[-1],
+            'source': str(audio_file),
+            'source_hash': source_hash,
+            'run_id': run_id,
         })
+    
+    # Only fresh transcripts are indexed, once the store holds them; reused ones are
+    # already there under their original source.
+    indexable = reused is None and segment_probes is not None and len(segment_probes[0]) >= fingerprint_index.min_frames
+    if indexable and not results[-1]['transcription'].startswith('ERROR'):
+        fingerprint_index.add(segment_probes[0], 'segment', source_hash, start=segment['start'], end=segment['end'])
+    
+    # Failed segments are left out of the checkpoint so a rerun retries them.
+    if checkpoint is not None and not results[-1]['transcription'].startswith('ERROR'):
+        checkpoint.add_result(results[-1])
+
+if store_writer is not None:
+    store_writer.close()
+
+failed_count = sum(1 for r in results if r['transcription'].startswith('ERROR'))
+if checkpoint is not None:
+    if failed_count:
+        # Kept so that rerunning only retries the failed segments.
+        checkpoint.save()
+        print(f"♻️  {failed_count} segments failed; checkpoint kept for a rerun: {checkpoint.path}")
+    else:
+        checkpoint.complete()
+
+if fingerprint_index is not None and not duplicate_results:
+    if any(not r['transcription'].startswith('ERROR') for r in results):
+        fingerprint_index.add(file_probes[0], 'file', source_hash, trim_start=trim_start)
+    # Merging holds the index lock, so it is left to `python -m storage.fingerprint_index merge`
+    # rather than run here, where it would block other workers' adds.
+    unmerged = fingerprint_index.unmerged_count()
+    if unmerged >= config.FINGERPRINT_CONFIG["merge_every"]:
+        print(f"🗂️  {unmerged} fingerprint entries await merging; run: python -m storage.fingerprint_index merge")
 
 print(f"\n{'='*60}")
 print("📊 SUMMARY")
 print(f"{'='*60}")
 print(f"Total segments: {len(speech_segments)}")
 print(f"Successfully transcribed: {sum(1 for r in results if not r['transcription'].startswith('ERROR'))}")
-print(f"Failed: {sum(1 for r in results if r['transcription'].startswith('ERROR'))}")
+if fingerprint_index is not None:
+    print(f"Reused from earlier transcripts: {reused_count}")
+if governor is not None:
+    print(f"Segments per quality level: {governor.segments_per_level}")
+    print(f"Quality adjustments: {len(governor.adjustments)} (logged to {governor.audit_log})")
+print(f"Failed: {failed_count}")
 
 print(f"\n{'='*60}")
 print("📝 ALL TRANSCRIPTIONS:")
@@ -111,5 +279,7 @@ print(full_text)
 print(f"\n   Total length: {len(full_text)} characters")
 print(f"   Total tokens (approx): ~{len(full_text.split())} words")
 print(f"   Effective max tokens: {len(speech_segments) * config.TRANSCRIBE_CONFIG['max_new_tokens']} (across {len(speech_segments)} chunks)")
+if store_writer is not None:
+    print(f"   Stored {store_writer.records_written} results in {result_store.store_dir}")
 print(f"{'='*60}")
 
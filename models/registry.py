@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import json
+import argparse
+import hashlib
+import threading
+from pathlib import Path
+import config
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+VAD_DIR = BASE_DIR / "models" / "vad"
+
+if str(VAD_DIR) not in sys.path:
+    sys.path.insert(0, str(VAD_DIR))
+
+class ModelRegistryError(Exception):
+    pass
+
+class ModelNotFoundError(ModelRegistryError):
+    pass
+
+class ChecksumMismatchError(ModelRegistryError):
+    pass
+
+class ModelLoadError(ModelRegistryError):
+    pass
+
+# Sidecar next to the model files: digests already computed, keyed on each file's size and mtime.
+VERIFIED_CACHE = ".sha256-verified.json"
+
+_registry_lock = threading.Lock()
+_model_locks = {}
+_models = {}
+_load_times = {}
+
+def sha256_file(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_model_dir(name):
+    if name == "silero_vad":
+        return Path(config.VAD_CONFIG["model_dir"])
+    if name == "whisper":
+        return Path(config.WHISPER_CONFIG["model_dir"])
+    raise ModelNotFoundError(f"Unknown model '{name}'")
+
+def read_manifest(model_dir):
+    # sha256sum format: "<hex digest>  <filename>" per line.
+    path = model_dir / config.MODEL_REGISTRY_CONFIG["manifest_name"]
+    if not path.exists():
+        return {}
+    manifest = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                digest, filename = line.split(None, 1)
+                manifest[filename.strip().lstrip('*')] = digest.lower()
+    return manifest
+
+def _required_files(name, model_dir):
+    files = {}
+    for pattern, expected in config.MODEL_REGISTRY_CONFIG["checksums"].get(name, {}).items():
+        if any(char in pattern for char in "*?["):
+            matches = sorted(model_dir.glob(pattern))
+            if not matches:
+                raise ModelNotFoundError(f"{name}: no file matching {pattern} in {model_dir}")
+            for path in matches:
+                files[path.name] = None
+        else:
+            if not (model_dir / pattern).exists():
+                raise ModelNotFoundError(f"{name}: missing {model_dir / pattern}")
+            files[pattern] = expected
+    return files
+
+def write_manifest(name):
+    model_dir = get_model_dir(name)
+    manifest_name = config.MODEL_REGISTRY_CONFIG["manifest_name"]
+    _required_files(name, model_dir)
+    # Everything shipped with the model is pinned, not just the files needed to load it.
+    lines = [
+        f"{sha256_file(path)}  {path.name}\n"
+        for path in sorted(model_dir.iterdir())
+        if path.is_file() and path.name != manifest_name and not path.name.startswith('.')
+    ]
+    manifest_path = model_dir / manifest_name
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    return manifest_path
+
+def _read_verified(model_dir):
+    try:
+        with open(model_dir / VERIFIED_CACHE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_verified(model_dir, verified):
+    tmp_path = model_dir / f"{VERIFIED_CACHE}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(verified, f)
+        os.replace(tmp_path, model_dir / VERIFIED_CACHE)
+    except OSError:
+        # A read-only model directory only means the next load hashes again.
+        pass
+
+def verify_model_files(name, model_dir):
+    files = _required_files(name, model_dir)
+    if not config.MODEL_REGISTRY_CONFIG["verify_checksums"]:
+        return
+    
+    pinned = {filename: expected for filename, expected in files.items() if expected}
+    for filename, expected in read_manifest(model_dir).items():
+        pinned.setdefault(filename, expected)
+    
+    # model.bin can be gigabytes; a file is only hashed again when its size or mtime changed.
+    verified = _read_verified(model_dir)
+    hashed = False
+    for filename, expected in pinned.items():
+        path = model_dir / filename
+        if not path.exists():
+            raise ModelNotFoundError(f"{name}: missing {path}")
+        stat = path.stat()
+        cached = verified.get(filename)
+        if cached is not None and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            actual = cached['sha256']
+        else:
+            actual = sha256_file(path)
+            verified[filename] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': actual}
+            hashed = True
+        if actual != expected.lower():
+            raise ChecksumMismatchError(f"{name}: {path} has sha256 {actual}, expected {expected}")
+    if hashed:
+        _write_verified(model_dir, verified)
+
+def resolve_vad_model():
+    model_dir = get_model_dir("silero_vad")
+    model_path = Path(config.VAD_CONFIG["model_path"])
+    
+    if not model_path.exists():
+        if not config.MODEL_REGISTRY_CONFIG["allow_download"]:
+            raise ModelNotFoundError(
+                f"silero_vad: {model_path} not found and downloads are disabled; "
+                f"copy it from {config.VAD_CONFIG['model_url']}"
+            )
+        from src.model import download_onnx_model, ModelDownloadError
+        try:
+            download_onnx_model(str(model_path), config.VAD_CONFIG["model_url"], str(model_dir))
+        except ModelDownloadError as e:
+            raise ModelNotFoundError(f"silero_vad: {e}") from e
+    
+    verify_model_files("silero_vad", model_dir)
+    return model_path
+
+def resolve_whisper_model():
+    model_dir = get_model_dir("whisper")
+    if not model_dir.is_dir():
+        raise ModelNotFoundError(f"whisper: model directory {model_dir} not found")
+    verify_model_files("whisper", model_dir)
+    return model_dir
+
+def _build_vad_session():
+    from src.model import load_silero_vad_onnx, VADModelError
+    model_path = resolve_vad_model()
+    try:
+        return load_silero_vad_onnx(
+            str(model_path),
+            config.VAD_CONFIG["model_url"],
+            str(config.VAD_CONFIG["model_dir"]),
+            variant=config.VAD_CONFIG["model_variant"],
+            preset=config.VAD_CONFIG["session_preset"],
+            cache_optimized_graph=config.VAD_CONFIG["cache_optimized_graph"],
+        )
+    except VADModelError as e:
+        raise ModelLoadError(f"silero_vad: {e}") from e
+
+def _build_whisper_model():
+    model_dir = resolve_whisper_model()
+    try:
+        from faster_whisper import WhisperModel
+        return WhisperModel(
+            str(model_dir),
+            device=config.WHISPER_CONFIG["device"],
+            compute_type=config.WHISPER_CONFIG["compute_type"],
+            cpu_threads=config.WHISPER_CONFIG["cpu_threads"],
+            num_workers=config.WHISPER_CONFIG["num_workers"],
+        )
+    except Exception as e:
+        raise ModelLoadError(f"whisper: could not load {model_dir}: {e}") from e
+
+_BUILDERS = {
+    "silero_vad": _build_vad_session,
+    "whisper": _build_whisper_model,
+}
+
+def get_model(name):
+    model = _models.get(name)
+    if model is not None:
+        return model
+    
+    if name not in _BUILDERS:
+        raise ModelNotFoundError(f"Unknown model '{name}'")
+    
+    with _registry_lock:
+        lock = _model_locks.setdefault(name, threading.Lock())
+    
+    with lock:
+        model = _models.get(name)
+        if model is None:
+            start = time.perf_counter()
+            model = _BUILDERS[name]()
+            _load_times[name] = time.perf_counter() - start
+            _models[name] = model
+            print(f"⏱️  Loaded {name} in {_load_times[name]:.2f}s (pid {os.getpid()})")
+    return model
+
+def get_vad_session():
+    return get_model("silero_vad")
+
+def get_whisper_model():
+    return get_model("whisper")
+
+def get_load_times():
+    return dict(_load_times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify local models or pin their checksums")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pin_parser = subparsers.add_parser("pin", help="Write the sha256 manifest for a model's current files")
+    pin_parser.add_argument("name", choices=list(_BUILDERS))
+    verify_parser = subparsers.add_parser("verify", help="Check a model's files against its checksums")
+    verify_parser.add_argument("name", choices=list(_BUILDERS))
+    args = parser.parse_args()
+    
+    try:
+        if args.command == "pin":
+            print(f"📌 Wrote {write_manifest(args.name)}")
+        else:
+            model_dir = get_model_dir(args.name)
+            verify_model_files(args.name, model_dir)
+            pinned = any(config.MODEL_REGISTRY_CONFIG["checksums"].get(args.name, {}).values()) or read_manifest(model_dir)
+            if pinned:
+                print(f"✅ {args.name}: files match their checksums")
+            else:
+                print(f"⚠️  {args.name}: files present but no checksums pinned; run: python -m models.registry pin {args.name}")
+    except ModelRegistryError as e:
+        print(f"❌ {type(e).__name__}: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
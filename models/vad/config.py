@@ -7,10 +7,14 @@ DEFAULT_MIN_SPEECH_DURATION_MS = 250
 DEFAULT_MIN_SILENCE_DURATION_MS = 400
 DEFAULT_SILENCE_PAD_MS = 500
 DEFAULT_PRE_ROLL_MS = 500
+DEFAULT_ENERGY_GATE_DBFS = -60.0
 
 ONNX_MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
 ONNX_MODEL_URL = "https://huggingface.co/onnx-community/silero-vad/resolve/main/onnx/model.onnx"
 ONNX_MODEL_PATH = os.path.join(ONNX_MODEL_DIR, "silero_vad.onnx")
+ONNX_MODEL_VARIANT = "default"
+ONNX_SESSION_PRESET = "default"
+ONNX_CACHE_OPTIMIZED_GRAPH = False
 
 RECORDINGS_DIR = "chunks"
 
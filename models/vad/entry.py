@@ -15,6 +15,14 @@ def main():
                         help=f"Min silence (default={config.DEFAULT_MIN_SILENCE_DURATION_MS})")
     parser.add_argument("--silence-pad-ms", type=int, default=config.DEFAULT_SILENCE_PAD_MS,
                         help=f"Silence padding (default={config.DEFAULT_SILENCE_PAD_MS})")
+    parser.add_argument("--energy-gate-dbfs", type=float, default=config.DEFAULT_ENERGY_GATE_DBFS,
+                        help=f"Skip VAD inference below this frame energy (default={config.DEFAULT_ENERGY_GATE_DBFS})")
+    
+    parser.add_argument("--model-variant", default=config.ONNX_MODEL_VARIANT, choices=["default", "int8"],
+                        help=f"ONNX model variant (default={config.ONNX_MODEL_VARIANT})")
+    parser.add_argument("--session-preset", default=config.ONNX_SESSION_PRESET,
+                        choices=["default", "single_thread", "throughput", "low_memory"],
+                        help=f"onnxruntime session preset (default={config.ONNX_SESSION_PRESET})")
     
     args = parser.parse_args()
 
@@ -23,11 +31,15 @@ def main():
         min_speech_duration_ms=args.min_speech_ms,
         min_silence_duration_ms=args.min_silence_ms,
         silence_pad_ms=args.silence_pad_ms,
+        energy_gate_dbfs=args.energy_gate_dbfs,
         sample_rate=config.SAMPLE_RATE,
         chunk_duration_ms=config.DEFAULT_CHUNK_DURATION_MS,
         model_path=config.ONNX_MODEL_PATH,
         model_url=config.ONNX_MODEL_URL,
         model_dir=config.ONNX_MODEL_DIR,
+        model_variant=args.model_variant,
+        session_preset=args.session_preset,
+        cache_optimized_graph=config.ONNX_CACHE_OPTIMIZED_GRAPH,
         recordings_dir=config.RECORDINGS_DIR
     )
 
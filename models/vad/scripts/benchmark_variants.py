@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import wave
+import argparse
+import numpy as np
+
+VAD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if VAD_DIR not in sys.path:
+    sys.path.insert(0, VAD_DIR)
+
+import config
+from src.model import (
+    MODEL_VARIANTS,
+    SESSION_PRESETS,
+    download_onnx_model,
+    prepare_model_variant,
+    create_inference_session,
+    get_optimized_path,
+)
+from src.vad_state import VADState
+from src.processor import process_audio_chunk_onnx
+
+def read_wav_mono(path, sample_rate):
+    with wave.open(path, 'rb') as wf:
+        nch = wf.getnchannels()
+        sampwidth = wf.getsampwidth()
+        fr = wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+    
+    if sampwidth != 2:
+        print(f"Only 16-bit PCM WAV is supported (got {sampwidth * 8}-bit)")
+        sys.exit(1)
+    
+    data = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    if nch > 1:
+        data = data.reshape(-1, nch).mean(axis=1)
+    if fr != sample_rate:
+        new_n = int(len(data) * sample_rate / float(fr))
+        data = np.interp(
+            np.linspace(0, len(data), new_n, endpoint=False),
+            np.arange(len(data)),
+            data
+        ).astype(np.float32)
+    return data
+
+def probability_track(session, audio, sample_rate):
+    vad_state = VADState(sampling_rate=sample_rate)
+    window = vad_state.window_size_samples
+    probs = []
+    start = time.perf_counter()
+    for i in range(0, len(audio) - window + 1, window):
+        probs.append(process_audio_chunk_onnx(audio[i:i + window], session, vad_state))
+    elapsed = time.perf_counter() - start
+    return np.array(probs, dtype=np.float32), elapsed
+
+def timed_session(model_path, preset, cache_optimized_graph):
+    start = time.perf_counter()
+    session = create_inference_session(model_path, preset, cache_optimized_graph)
+    return session, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Silero VAD ONNX variants and session presets")
+    parser.add_argument("wav", help="16-bit PCM WAV file to run the VAD over")
+    parser.add_argument("--threshold", type=float, default=config.DEFAULT_VAD_THRESHOLD,
+                        help=f"Threshold for speech decision agreement (default={config.DEFAULT_VAD_THRESHOLD})")
+    parser.add_argument("--variants", nargs="+", default=list(MODEL_VARIANTS), choices=list(MODEL_VARIANTS))
+    parser.add_argument("--presets", nargs="+", default=list(SESSION_PRESETS), choices=list(SESSION_PRESETS))
+    args = parser.parse_args()
+    
+    audio = read_wav_mono(args.wav, config.SAMPLE_RATE)
+    audio_sec = len(audio) / config.SAMPLE_RATE
+    model_path = download_onnx_model(config.ONNX_MODEL_PATH, config.ONNX_MODEL_URL, config.ONNX_MODEL_DIR)
+    
+    baseline_session, _ = timed_session(model_path, "default", False)
+    baseline, _ = probability_track(baseline_session, audio, config.SAMPLE_RATE)
+    baseline_speech = baseline > args.threshold
+    
+    print(f"Audio: {args.wav} ({audio_sec:.2f}s, {len(baseline)} frames)")
+    print(f"{'variant':<8} {'preset':<14} {'graph':<7} {'load ms':>8} {'RTF':>8} {'us/frame':>9} "
+          f"{'mean |dp|':>10} {'max |dp|':>9} {'agree %':>8}")
+    
+    for variant in args.variants:
+        variant_path = prepare_model_variant(model_path, variant)
+        for preset in args.presets:
+            for cached in (False, True):
+                if cached:
+                    # First load serializes the graph; time the warm start that reuses it.
+                    optimized_path = get_optimized_path(variant_path)
+                    if os.path.exists(optimized_path):
+                        os.remove(optimized_path)
+                    timed_session(variant_path, preset, True)
+                
+                session, load_sec = timed_session(variant_path, preset, cached)
+                probs, run_sec = probability_track(session, audio, config.SAMPLE_RATE)
+                
+                diff = np.abs(probs - baseline)
+                agree = np.mean((probs > args.threshold) == baseline_speech) * 100.0 if len(probs) else 100.0
+                rtf = run_sec / audio_sec if audio_sec else 0.0
+                us_per_frame = run_sec / max(1, len(probs)) * 1e6
+                mean_diff = float(diff.mean()) if len(diff) else 0.0
+                max_diff = float(diff.max()) if len(diff) else 0.0
+                print(f"{variant:<8} {preset:<14} {'cached' if cached else 'raw':<7} {load_sec * 1000:>8.1f} "
+                      f"{rtf:>8.4f} {us_per_frame:>9.1f} {mean_diff:>10.5f} {max_diff:>9.5f} {agree:>8.2f}")
+
+if __name__ == "__main__":
+    main()
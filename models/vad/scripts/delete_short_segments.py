@@ -1,30 +1,47 @@
 import os
-import wave
 import sys
+import argparse
 
-REC_DIR = os.path.join(os.getcwd(), 'recordings')
+from scan_recordings import default_recordings_dir, index_path_for, load_index, save_index, scan
+
+parser = argparse.ArgumentParser(description='Delete WAV recordings shorter than a threshold')
+parser.add_argument('--dir', default=default_recordings_dir(), help='Recordings directory (default: ./recordings)')
+parser.add_argument('--threshold', type=float, default=0.5, help='Minimum duration to keep, in seconds')
+parser.add_argument('--recursive', action='store_true',
+                    help='Also delete short files in subdirectories (default: top level only)')
+parser.add_argument('--jobs', type=int, default=None, help='Worker processes for the header scan')
+args = parser.parse_args()
+
+REC_DIR = args.dir
 if not os.path.isdir(REC_DIR):
     print('No recordings/ directory found')
     sys.exit(0)
 
-threshold = 0.5
+threshold = args.threshold
+# Durations come from WAV headers only, and files unchanged since the last scan
+# are taken from the index without being opened at all.
+index, _ = scan(REC_DIR, jobs=args.jobs, recursive=args.recursive)
+
 deleted = []
-for fn in sorted(os.listdir(REC_DIR)):
-    if not fn.lower().endswith('.wav'):
+for fn in sorted(index):
+    entry = index[fn]
+    if 'error' in entry:
+        print(f"Error reading {fn}: {entry['error']}")
         continue
-    path = os.path.join(REC_DIR, fn)
-    try:
-        with wave.open(path, 'rb') as wf:
-            fr = wf.getframerate()
-            n = wf.getnframes()
-            duration = n / float(fr) if fr else 0.0
-        if duration < threshold:
-            os.remove(path)
-            deleted.append((fn, duration))
-    except Exception as e:
-        print(f'Error reading {fn}: {e}')
+    if entry['duration'] < threshold:
+        try:
+            os.remove(os.path.join(REC_DIR, fn))
+        except OSError as e:
+            print(f'Error deleting {fn}: {e}')
+            continue
+        deleted.append((fn, entry['duration']))
 
 if deleted:
+    # Drop the deleted files from the saved index, which may also hold entries this scan did not cover.
+    saved = load_index(index_path_for(REC_DIR))
+    for fn, _ in deleted:
+        saved.pop(fn, None)
+    save_index(index_path_for(REC_DIR), saved)
     print('Deleted files:')
     for fn, d in deleted:
         print(f"  {fn}  ({d:.3f}s)")
@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+VAD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if VAD_DIR not in sys.path:
+    sys.path.insert(0, VAD_DIR)
+
+import config
+from src.processor import frame_energy_dbfs
+
+INDEX_NAME = '.scan_index.jsonl'
+BLOCK_FRAMES = 1 << 16
+SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+SAMPLE_SCALES = {1: 128.0, 2: 32768.0, 4: 2147483648.0}
+
+def default_recordings_dir():
+    return os.path.join(os.getcwd(), 'recordings')
+
+def iter_wav_files(root, recursive=False):
+    # scandir hands back the mtime and size with each entry, so a rescan of an
+    # unchanged directory costs one listing and no file opens.
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith('.wav') and entry.is_file():
+                    st = entry.stat()
+                    yield os.path.relpath(entry.path, root), st.st_mtime_ns, st.st_size
+
+def read_header(path):
+    with wave.open(path, 'rb') as wf:
+        fr = wf.getframerate()
+        n = wf.getnframes()
+        return {
+            'channels': wf.getnchannels(),
+            'sample_rate': fr,
+            'sample_width': wf.getsampwidth(),
+            'frames': n,
+            'duration': n / float(fr) if fr else 0.0,
+        }
+
+def to_mono_float(raw, nch, sampwidth):
+    if sampwidth not in SAMPLE_DTYPES:
+        raise ValueError(f'unsupported sample width: {sampwidth * 8}-bit')
+    data = np.frombuffer(raw, dtype=SAMPLE_DTYPES[sampwidth]).astype(np.float32)
+    if sampwidth == 1:
+        data -= 128.0
+    data /= SAMPLE_SCALES[sampwidth]
+    if nch > 1:
+        data = data[:len(data) - len(data) % nch].reshape(-1, nch).mean(axis=1)
+    return data
+
+def read_stats(path, silence_dbfs, window_ms, block_frames=BLOCK_FRAMES):
+    # Peak, RMS and the share of silent windows, read a block at a time so memory
+    # stays flat however long the file is.
+    with wave.open(path, 'rb') as wf:
+        nch = wf.getnchannels()
+        sampwidth = wf.getsampwidth()
+        fr = wf.getframerate()
+        window = max(1, int(fr * window_ms // 1000))
+        block_frames = max(window, block_frames // window * window)
+        
+        peak = 0.0
+        sum_squares = 0.0
+        samples = 0
+        windows = 0
+        silent_windows = 0
+        while True:
+            mono = to_mono_float(wf.readframes(block_frames), nch, sampwidth)
+            if mono.size == 0:
+                break
+            peak = max(peak, float(np.max(np.abs(mono))))
+            sum_squares += float(np.dot(mono, mono))
+            samples += mono.size
+            
+            full = mono.size // window * window
+            if full:
+                silent_windows += int(np.count_nonzero(frame_energy_dbfs(mono[:full].reshape(-1, window)) < silence_dbfs))
+                windows += full // window
+            if full < mono.size:
+                tail = np.zeros(window, dtype=np.float32)
+                tail[:mono.size - full] = mono[full:]
+                silent_windows += int(frame_energy_dbfs(tail) < silence_dbfs)
+                windows += 1
+    
+    return {
+        'peak': peak,
+        'rms': float(np.sqrt(sum_squares / samples)) if samples else 0.0,
+        'silence_ratio': silent_windows / windows if windows else 0.0,
+        'silence_dbfs': silence_dbfs,
+    }
+
+def scan_file(path, stats=False, silence_dbfs=config.DEFAULT_ENERGY_GATE_DBFS,
+              window_ms=config.DEFAULT_CHUNK_DURATION_MS):
+    try:
+        entry = read_header(path)
+        if stats:
+            entry.update(read_stats(path, silence_dbfs, window_ms))
+    except Exception as e:
+        entry = {'error': f'{type(e).__name__}: {e}'}
+    return entry
+
+def _scan_task(task):
+    relpath, mtime_ns, size, path, stats, silence_dbfs, window_ms = task
+    entry = scan_file(path, stats, silence_dbfs, window_ms)
+    entry.update({'file': relpath, 'mtime_ns': mtime_ns, 'size': size})
+    return entry
+
+def index_path_for(root):
+    return os.path.join(root, INDEX_NAME)
+
+def load_index(index_path):
+    index = {}
+    if not os.path.exists(index_path):
+        return index
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                index[entry['file']] = entry
+    return index
+
+def save_index(index_path, index):
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for relpath in sorted(index):
+            f.write(json.dumps(index[relpath]) + '\n')
+    os.replace(tmp_path, index_path)
+
+def is_fresh(entry, mtime_ns, size, stats, silence_dbfs):
+    if entry is None or entry['mtime_ns'] != mtime_ns or entry['size'] != size:
+        return False
+    if stats and 'error' not in entry and entry.get('silence_dbfs') != silence_dbfs:
+        return False
+    return True
+
+def scan(root, stats=False, jobs=None, index_path=None, silence_dbfs=config.DEFAULT_ENERGY_GATE_DBFS,
+         window_ms=config.DEFAULT_CHUNK_DURATION_MS, chunksize=256, recursive=False):
+    """Index every WAV in root (and its subdirectories if recursive), re-reading only
+    files whose mtime or size changed since the last run (or that lack stats when
+    stats are asked for)."""
+    index_path = index_path or index_path_for(root)
+    previous = load_index(index_path)
+    
+    # Entries from an earlier recursive scan are outside a top-level scan's scope; they
+    # are kept in the index file but not returned.
+    outside = {} if recursive else {relpath: entry for relpath, entry in previous.items() if os.sep in relpath}
+    index = {}
+    tasks = []
+    for relpath, mtime_ns, size in iter_wav_files(root, recursive):
+        entry = previous.get(relpath)
+        if is_fresh(entry, mtime_ns, size, stats, silence_dbfs):
+            index[relpath] = entry
+        else:
+            tasks.append((relpath, mtime_ns, size, os.path.join(root, relpath), stats, silence_dbfs, window_ms))
+    
+    removed = len(set(previous) - set(outside) - set(index) - {task[0] for task in tasks})
+    if tasks:
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(tasks) < chunksize:
+            for entry in map(_scan_task, tasks):
+                index[entry['file']] = entry
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                for entry in executor.map(_scan_task, tasks, chunksize=chunksize):
+                    index[entry['file']] = entry
+    
+    if tasks or removed:
+        save_index(index_path, {**outside, **index})
+    return index, {'files': len(index), 'scanned': len(tasks), 'reused': len(index) - len(tasks), 'removed': removed}
+
+def main():
+    parser = argparse.ArgumentParser(description='Index WAV recordings (duration, peak, RMS, silence) in parallel')
+    parser.add_argument('--dir', default=default_recordings_dir(), help='Recordings directory (default: ./recordings)')
+    parser.add_argument('--recursive', action='store_true', help='Also scan subdirectories')
+    parser.add_argument('--stats', action='store_true', help='Also compute peak/RMS/silence (reads every sample)')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--index', default=None, help=f'Index file (default: <dir>/{INDEX_NAME})')
+    parser.add_argument('--silence-dbfs', type=float, default=config.DEFAULT_ENERGY_GATE_DBFS,
+                        help='Windows quieter than this count as silence')
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.dir):
+        print(f'No {args.dir} directory found')
+        sys.exit(1)
+    
+    started = time.perf_counter()
+    index, summary = scan(args.dir, args.stats, args.jobs, args.index, args.silence_dbfs, recursive=args.recursive)
+    elapsed = time.perf_counter() - started
+    
+    errors = [entry for entry in index.values() if 'error' in entry]
+    durations = np.array([entry['duration'] for entry in index.values() if 'error' not in entry])
+    print(f"Indexed {summary['files']} files in {elapsed:.2f}s "
+          f"({summary['scanned']} scanned, {summary['reused']} unchanged, {summary['removed']} removed)")
+    if durations.size:
+        print(f'Total duration: {durations.sum() / 3600.0:.2f}h, '
+              f'median {np.median(durations):.3f}s, shortest {durations.min():.3f}s')
+    if args.stats:
+        silence = np.array([entry['silence_ratio'] for entry in index.values() if 'silence_ratio' in entry])
+        if silence.size:
+            print(f'Mostly silent (>90% windows below {args.silence_dbfs} dBFS): {int(np.sum(silence > 0.9))} files')
+    for entry in errors[:10]:
+        print(f"Error reading {entry['file']}: {entry['error']}")
+    if len(errors) > 10:
+        print(f'... ({len(errors) - 10} more errors)')
+
+if __name__ == '__main__':
+    main()
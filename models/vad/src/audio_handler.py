@@ -33,6 +33,15 @@ def resample_audio(audio_chunk, device_rate, target_rate):
     return resampled_chunk
 
 def save_audio_wav(filepath, audio_data, sample_rate):
+    if audio_data.dtype == np.int16:
+        # Already 16-bit PCM: write the samples as they are, with no float round trip.
+        with wave.open(filepath, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(audio_data.tobytes())
+        return
+    
     audio_float = audio_data.astype(np.float32)
     audio_clipped = np.clip(audio_float, -1.0, 1.0)
     
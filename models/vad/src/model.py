@@ -1,8 +1,36 @@
 import os
-import sys
 import urllib.request
 import onnxruntime
 
+MODEL_VARIANTS = ("default", "int8")
+
+SESSION_PRESETS = {
+    "default": {},
+    "single_thread": {
+        "intra_op_num_threads": 1,
+        "inter_op_num_threads": 1,
+        "execution_mode": onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+    },
+    "throughput": {
+        "intra_op_num_threads": 0,
+        "inter_op_num_threads": 0,
+        "execution_mode": onnxruntime.ExecutionMode.ORT_PARALLEL,
+    },
+    "low_memory": {
+        "intra_op_num_threads": 1,
+        "inter_op_num_threads": 1,
+        "execution_mode": onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+        "enable_cpu_mem_arena": False,
+        "enable_mem_pattern": False,
+    },
+}
+
+class VADModelError(Exception):
+    pass
+
+class ModelDownloadError(VADModelError):
+    pass
+
 def download_onnx_model(model_path, model_url, model_dir):
     os.makedirs(model_dir, exist_ok=True)
     
@@ -13,17 +41,110 @@ def download_onnx_model(model_path, model_url, model_dir):
         urllib.request.urlretrieve(model_url, model_path)
         return model_path
     except Exception as e:
-        print(f"Failed to download ONNX model: {e}")
-        print(f"Try downloading manually from: {model_url}")
-        print(f"And save to: {model_path}")
-        sys.exit(1)
+        raise ModelDownloadError(
+            f"Failed to download ONNX model: {e}. "
+            f"Try downloading manually from {model_url} and save to {model_path}"
+        ) from e
+
+def build_session_options(preset="default"):
+    if preset not in SESSION_PRESETS:
+        raise ValueError(f"Unknown session preset '{preset}', expected one of {list(SESSION_PRESETS)}")
+    
+    options = onnxruntime.SessionOptions()
+    for name, value in SESSION_PRESETS[preset].items():
+        setattr(options, name, value)
+    return options
+
+def _is_fresh(derived_path, source_path):
+    return os.path.exists(derived_path) and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+
+def _temp_path(path):
+    # Derived models are written next to their final path and renamed into place, so a
+    # crash or a concurrent worker never leaves a truncated file that looks fresh.
+    root, ext = os.path.splitext(path)
+    return f"{root}.tmp-{os.getpid()}{ext}"
+
+def get_variant_path(model_path, variant):
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}', expected one of {MODEL_VARIANTS}")
+    if variant == "default":
+        return model_path
+    
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.{variant}{ext}"
 
-def load_silero_vad_onnx(model_path, model_url, model_dir):
+def get_optimized_path(model_path):
+    # Serialized graphs are only valid for the onnxruntime build that produced them.
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.optimized-ort{onnxruntime.__version__}{ext}"
+
+def quantize_silero_vad_onnx(model_path, output_path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    
+    # Silero keeps its weights inside the 8k/16k If branches. Only the LSTM is
+    # quantized: int8 Conv weights shift speech probabilities far past the threshold.
+    temp_path = _temp_path(output_path)
     try:
-        model_path = download_onnx_model(model_path, model_url, model_dir)
-        session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
-        return session
-    except Exception as e:
-        print(f"Could not load ONNX model: {e}")
-        sys.exit(1)
+        quantize_dynamic(
+            model_path,
+            temp_path,
+            weight_type=QuantType.QInt8,
+            op_types_to_quantize=["LSTM"],
+            extra_options={"EnableSubgraph": True},
+        )
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return output_path
 
+def prepare_model_variant(model_path, variant="default", rebuild=False):
+    variant_path = get_variant_path(model_path, variant)
+    if variant == "int8" and (rebuild or not _is_fresh(variant_path, model_path)):
+        quantize_silero_vad_onnx(model_path, variant_path)
+    return variant_path
+
+def create_inference_session(model_path, preset="default", cache_optimized_graph=False):
+    options = build_session_options(preset)
+    providers = ['CPUExecutionProvider']
+    
+    if not cache_optimized_graph:
+        return onnxruntime.InferenceSession(model_path, options, providers=providers)
+    
+    optimized_path = get_optimized_path(model_path)
+    if _is_fresh(optimized_path, model_path):
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            return onnxruntime.InferenceSession(optimized_path, options, providers=providers)
+        except Exception:
+            # An unreadable cache is rebuilt from the source model below.
+            options = build_session_options(preset)
+    
+    # Extended (not "all") optimizations keep the serialized graph portable across CPUs.
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    temp_path = _temp_path(optimized_path)
+    options.optimized_model_filepath = temp_path
+    try:
+        session = onnxruntime.InferenceSession(model_path, options, providers=providers)
+        os.replace(temp_path, optimized_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return session
+
+def load_silero_vad_onnx(model_path, model_url, model_dir, variant="default", preset="default",
+                         cache_optimized_graph=False):
+    model_path = download_onnx_model(model_path, model_url, model_dir)
+    variant_path = model_path
+    try:
+        variant_path = prepare_model_variant(model_path, variant)
+        try:
+            return create_inference_session(variant_path, preset, cache_optimized_graph)
+        except Exception:
+            if variant_path == model_path:
+                raise
+            # A derived model that does not load is rebuilt from the source model once.
+            variant_path = prepare_model_variant(model_path, variant, rebuild=True)
+            return create_inference_session(variant_path, preset, cache_optimized_graph)
+    except Exception as e:
+        raise VADModelError(f"Could not load ONNX model {variant_path}: {e}") from e
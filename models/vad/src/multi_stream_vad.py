@@ -0,0 +1,277 @@
+import time
+import threading
+import numpy as np
+
+from src.vad_state import VADState
+from src.processor import process_batch_onnx, frame_energy_dbfs, pcm16_to_float32, float32_to_pcm16
+
+class StreamContext:
+    def __init__(self, stream_id, sample_rate, pcm_dtype=np.float32):
+        self.stream_id = stream_id
+        self.vad_state = VADState(sampling_rate=sample_rate)
+        self.pending = np.zeros(0, dtype=pcm_dtype)
+        self.frames = []
+        self.buffer_start_frame = 0
+        self.total_frames = 0
+        self.speech_frame_count = 0
+        self.silent_frame_count = 0
+        self.gated_frame_count = 0
+        self.is_in_speech = False
+        self.speech_start_frame = None
+        self.last_speech_frame = None
+        self.closed_segments = []
+        self.tail_padding = 0
+
+class MultiStreamVAD:
+    def __init__(self, vad_session, sample_rate, vad_threshold, min_speech_duration_ms, min_silence_duration_ms,
+                 silence_pad_ms, chunk_duration_ms=32, max_batch_size=64, energy_gate_dbfs=None, on_segment=None,
+                 pcm_dtype=np.float32, max_frames_per_tick=4):
+        self.vad_session = vad_session
+        self.sample_rate = sample_rate
+        self.vad_threshold = vad_threshold
+        self.chunk_duration_ms = chunk_duration_ms
+        self.max_batch_size = max_batch_size
+        self.energy_gate_dbfs = energy_gate_dbfs
+        self.on_segment = on_segment
+        # np.int16 keeps every stream's pending audio and segment frames as 16-bit PCM;
+        # frames are converted to float32 only when they are batched for the model.
+        self.pcm_dtype = np.dtype(pcm_dtype)
+        # A stream that falls behind catches up at most this many frames per tick, so
+        # one burst of pushed audio cannot hold every other stream's tick hostage.
+        self.max_frames_per_tick = max(1, max_frames_per_tick)
+        
+        self.window_size = VADState(sampling_rate=sample_rate).window_size_samples
+        self.silence_threshold_frames = max(1, int((min_silence_duration_ms + chunk_duration_ms - 1) // chunk_duration_ms))
+        self.min_speech_frames = max(1, int((min_speech_duration_ms + chunk_duration_ms - 1) // chunk_duration_ms))
+        self.silence_pad_samples = int(silence_pad_ms / 1000.0 * sample_rate)
+        
+        self.streams = {}
+        self.lock = threading.Lock()
+        # Held while any stream's VAD state, frames or segments change, so the ticker
+        # thread and remove_stream never update the same stream at once.
+        self.process_lock = threading.Lock()
+        self.stats = {
+            'ticks': 0,
+            'batches': 0,
+            'frames': 0,
+            'skipped_frames': 0,
+            'max_tick_ms': 0.0,
+            'max_backlog_frames': 0,
+        }
+        self._thread = None
+        self._stop_event = threading.Event()
+    
+    def add_stream(self, stream_id):
+        with self.lock:
+            if stream_id in self.streams:
+                raise ValueError(f"Stream {stream_id!r} already registered")
+            self.streams[stream_id] = StreamContext(stream_id, self.sample_rate, self.pcm_dtype)
+    
+    def remove_stream(self, stream_id):
+        with self.process_lock:
+            with self.lock:
+                context = self.streams.pop(stream_id, None)
+            if context is None:
+                return
+            
+            # Frames still queued are scored in order before the partial tail.
+            full = len(context.pending) // self.window_size * self.window_size
+            for frame_start in range(0, full, self.window_size):
+                self._process_frame(context, context.pending[frame_start:frame_start + self.window_size])
+            if full < len(context.pending):
+                # The last partial frame is zero-padded for inference, like the final chunk of a file.
+                context.tail_padding = self.window_size - (len(context.pending) - full)
+                self._process_frame(context, np.pad(context.pending[full:], (0, context.tail_padding)))
+            context.pending = np.zeros(0, dtype=self.pcm_dtype)
+            
+            if context.is_in_speech:
+                self._close_segment(context)
+            self._emit_ready_segments(context, final=True)
+    
+    def _process_frame(self, context, frame):
+        gated = self.energy_gate_dbfs is not None and frame_energy_dbfs(frame) < self.energy_gate_dbfs
+        speech_prob = 0.0
+        if not gated:
+            speech_prob = process_batch_onnx(frame[np.newaxis], self.vad_session, [context.vad_state])[0]
+        self._update_stream(context, frame, speech_prob, gated)
+    
+    def push_audio(self, stream_id, audio_chunk):
+        audio_chunk = np.asarray(audio_chunk)
+        if self.pcm_dtype == np.int16:
+            audio_chunk = float32_to_pcm16(audio_chunk)
+        else:
+            audio_chunk = pcm16_to_float32(audio_chunk)
+        with self.lock:
+            context = self.streams[stream_id]
+            context.pending = np.concatenate([context.pending, audio_chunk])
+    
+    def _take_frames(self):
+        ready = []
+        with self.lock:
+            for context in self.streams.values():
+                backlog = len(context.pending) // self.window_size
+                self.stats['max_backlog_frames'] = max(self.stats['max_backlog_frames'], backlog)
+                if backlog == 0:
+                    continue
+                frame = context.pending[:self.window_size]
+                context.pending = context.pending[self.window_size:]
+                ready.append((context, frame))
+        return ready
+    
+    def tick(self):
+        with self.process_lock:
+            return self._tick()
+    
+    def _tick(self):
+        start = time.perf_counter()
+        processed = 0
+        
+        # One frame per stream per round keeps every stream's recurrent state in
+        # step; extra rounds only run for streams that fell behind, and whatever is
+        # left after max_frames_per_tick rounds waits for the next tick.
+        for _ in range(self.max_frames_per_tick):
+            ready = self._take_frames()
+            if not ready:
+                break
+            processed += len(ready)
+            
+            frames = np.stack([frame for _, frame in ready])
+            probs = np.zeros(len(ready), dtype=np.float32)
+            
+            gated = np.zeros(len(ready), dtype=bool)
+            if self.energy_gate_dbfs is not None:
+                gated = frame_energy_dbfs(frames) < self.energy_gate_dbfs
+                self.stats['skipped_frames'] += int(gated.sum())
+            
+            active = np.flatnonzero(~gated)
+            for batch_start in range(0, len(active), self.max_batch_size):
+                batch = active[batch_start:batch_start + self.max_batch_size]
+                vad_states = [ready[idx][0].vad_state for idx in batch]
+                probs[batch] = process_batch_onnx(frames[batch], self.vad_session, vad_states)
+                self.stats['batches'] += 1
+            
+            for idx, (context, frame) in enumerate(ready):
+                self._update_stream(context, frame, probs[idx], gated[idx])
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.stats['ticks'] += 1
+        self.stats['frames'] += processed
+        self.stats['max_tick_ms'] = max(self.stats['max_tick_ms'], elapsed_ms)
+        return processed
+    
+    def _update_stream(self, context, frame, speech_prob, gated):
+        frame_idx = context.total_frames
+        context.frames.append(frame)
+        context.total_frames += 1
+        
+        if gated:
+            context.gated_frame_count += 1
+            if context.gated_frame_count == self.silence_threshold_frames:
+                context.vad_state.reset()
+        else:
+            context.gated_frame_count = 0
+        
+        is_speech_now = speech_prob > self.vad_threshold
+        
+        if is_speech_now:
+            context.speech_frame_count += 1
+            context.silent_frame_count = 0
+            context.last_speech_frame = frame_idx
+            
+            if not context.is_in_speech:
+                if context.speech_frame_count >= self.min_speech_frames:
+                    context.is_in_speech = True
+                    context.speech_start_frame = max(context.buffer_start_frame, frame_idx - context.speech_frame_count)
+        else:
+            if not context.is_in_speech:
+                context.speech_frame_count = 0
+        
+        if context.is_in_speech:
+            if not is_speech_now:
+                context.silent_frame_count += 1
+            if context.silent_frame_count >= self.silence_threshold_frames:
+                self._close_segment(context)
+                self._reset_stream(context)
+        
+        self._emit_ready_segments(context)
+        self._trim_frames(context)
+    
+    def _close_segment(self, context):
+        if context.speech_start_frame is None or context.last_speech_frame is None:
+            return
+        start_sample = context.speech_start_frame * self.window_size
+        end_sample = (context.last_speech_frame + 1) * self.window_size + self.silence_pad_samples
+        context.closed_segments.append((start_sample, end_sample))
+    
+    def _emit_ready_segments(self, context, final=False):
+        # A closed segment waits until its silence pad has arrived, so streamed
+        # segments match what extract_speech_segments cuts from a whole file.
+        available = context.total_frames * self.window_size - context.tail_padding
+        while context.closed_segments:
+            start_sample, end_sample = context.closed_segments[0]
+            if end_sample > available and not final:
+                break
+            context.closed_segments.pop(0)
+            
+            offset = context.buffer_start_frame * self.window_size
+            buffered = np.concatenate(context.frames) if context.frames else np.zeros(0, dtype=self.pcm_dtype)
+            segment_audio = buffered[start_sample - offset:min(end_sample, available) - offset]
+            
+            if len(segment_audio) > 0 and self.on_segment is not None:
+                self.on_segment(context.stream_id, {
+                    'start': start_sample,
+                    'end': start_sample + len(segment_audio),
+                    'audio': segment_audio,
+                    'duration': len(segment_audio) / self.sample_rate
+                })
+    
+    def _trim_frames(self, context):
+        if context.is_in_speech:
+            keep_from = context.speech_start_frame
+        else:
+            # Outside speech only the frames a future segment could start in are kept.
+            keep_from = context.total_frames - (self.min_speech_frames + 1)
+        if context.closed_segments:
+            keep_from = min(keep_from, context.closed_segments[0][0] // self.window_size)
+        
+        drop = keep_from - context.buffer_start_frame
+        if drop > 0:
+            del context.frames[:drop]
+            context.buffer_start_frame += drop
+    
+    def _reset_stream(self, context):
+        context.vad_state.reset()
+        context.is_in_speech = False
+        context.silent_frame_count = 0
+        context.speech_frame_count = 0
+        context.speech_start_frame = None
+        context.last_speech_frame = None
+    
+    def _run(self):
+        tick_sec = self.chunk_duration_ms / 1000.0
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            self.tick()
+            next_tick += tick_sec
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                # Behind schedule: run the next tick immediately rather than bursting to catch up.
+                next_tick = time.monotonic()
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="multi-stream-vad", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        while self.tick():
+            pass
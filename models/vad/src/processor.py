@@ -1,7 +1,25 @@
 import numpy as np
 
+PCM16_SCALE = 32768.0
+
+def pcm16_to_float32(audio):
+    # Buffers may hold int16 PCM; models and energy measures work on float32 in [-1, 1).
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / PCM16_SCALE
+    return np.asarray(audio, dtype=np.float32)
+
+def float32_to_pcm16(audio):
+    if audio.dtype == np.int16:
+        return audio
+    return np.clip(np.round(np.asarray(audio) * PCM16_SCALE), -32768, 32767).astype(np.int16)
+
+def frame_energy_dbfs(frames):
+    frames = pcm16_to_float32(np.asarray(frames))
+    rms = np.sqrt(np.mean(np.square(frames), axis=-1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
 def process_audio_chunk_onnx(audio_chunk, model_session, vad_state, threshold=0.5):
-    audio_chunk = audio_chunk.astype(np.float32)
+    audio_chunk = pcm16_to_float32(audio_chunk)
     
     if len(audio_chunk) < vad_state.window_size_samples:
         audio_chunk = np.pad(audio_chunk, (0, vad_state.window_size_samples - len(audio_chunk)))
@@ -30,3 +48,34 @@ def process_audio_chunk_onnx(audio_chunk, model_session, vad_state, threshold=0.
         print(f"VAD inference error: {e}")
         return 0.0
 
+
+def process_batch_onnx(audio_frames, model_session, vad_states):
+    audio_input = pcm16_to_float32(np.asarray(audio_frames)).reshape(len(vad_states), -1)
+    window_size = vad_states[0].window_size_samples
+    if audio_input.shape[1] < window_size:
+        audio_input = np.pad(audio_input, ((0, 0), (0, window_size - audio_input.shape[1])))
+    else:
+        audio_input = audio_input[:, :window_size]
+    
+    # Silero's recurrent state is (2, batch, 128), so streams stack along axis 1.
+    state = np.concatenate([vad_state.state for vad_state in vad_states], axis=1)
+    sr_tensor = np.array([vad_states[0].sampling_rate], dtype=np.int64)
+    
+    try:
+        inputs = {
+            'input': audio_input,
+            'state': state,
+            'sr': sr_tensor
+        }
+        
+        output_names = [out.name for out in model_session.get_outputs()]
+        outputs = model_session.run(output_names, inputs)
+        
+        for idx, vad_state in enumerate(vad_states):
+            vad_state.state = outputs[1][:, idx:idx + 1, :].copy()
+        
+        return outputs[0][:, 0].astype(np.float32)
+        
+    except Exception as e:
+        print(f"VAD batch inference error: {e}")
+        return np.zeros(len(vad_states), dtype=np.float32)
@@ -17,9 +17,9 @@ except ImportError:
     print("pyaudio is required")
     sys.exit(1)
 
-from src.model import load_silero_vad_onnx
+from src.model import load_silero_vad_onnx, VADModelError
 from src.vad_state import VADState
-from src.processor import process_audio_chunk_onnx
+from src.processor import process_audio_chunk_onnx, frame_energy_dbfs, pcm16_to_float32, float32_to_pcm16
 from src.audio_handler import resample_audio, save_audio_wav
 import config
 
@@ -28,8 +28,14 @@ def check_pyaudio_available():
         print("pyaudio is required")
         sys.exit(1)
 
-def initialize_vad_session(model_path, model_url, model_dir, sample_rate):
-    vad_session = load_silero_vad_onnx(model_path, model_url, model_dir)
+def initialize_vad_session(model_path, model_url, model_dir, sample_rate, model_variant="default",
+                           session_preset="default", cache_optimized_graph=False):
+    vad_session = load_silero_vad_onnx(
+        model_path, model_url, model_dir,
+        variant=model_variant,
+        preset=session_preset,
+        cache_optimized_graph=cache_optimized_graph
+    )
     vad_state = VADState(sampling_rate=sample_rate)
     return vad_session, vad_state
 
@@ -60,8 +66,9 @@ def calculate_threshold_frames(min_silence_duration_ms, min_speech_duration_ms,
     return silence_threshold_frames, min_speech_frames
 
 def initialize_buffers():
-    resampled_buffer = np.zeros(0, dtype=np.float32)
-    original_buffer = np.zeros(0, dtype=np.float32)
+    # Both buffers hold int16 PCM, half the size of float32, for the whole utterance.
+    resampled_buffer = np.zeros(0, dtype=np.int16)
+    original_buffer = np.zeros(0, dtype=np.int16)
     buffer_start_frame = 0
     return resampled_buffer, original_buffer, buffer_start_frame
 
@@ -73,6 +80,8 @@ def initialize_speech_state():
     speech_start_time = None
     last_speech_time = None
     speech_frame_count = 0
+    gated_frame_count = 0
+    skipped_frames = 0
     return {
         'chunk_count': chunk_count,
         'total_frames': total_frames,
@@ -80,12 +89,14 @@ def initialize_speech_state():
         'is_in_speech': is_in_speech,
         'speech_start_time': speech_start_time,
         'last_speech_time': last_speech_time,
-        'speech_frame_count': speech_frame_count
+        'speech_frame_count': speech_frame_count,
+        'gated_frame_count': gated_frame_count,
+        'skipped_frames': skipped_frames
     }
 
 def read_audio_chunk(stream, frames_per_buffer):
     data = stream.read(frames_per_buffer, exception_on_overflow=False)
-    audio_chunk = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+    audio_chunk = np.frombuffer(data, dtype=np.int16)
     return audio_chunk
 
 def update_audio_buffers(audio_chunk, original_buffer, resampled_buffer, buffer_start_frame, total_frames, device_rate, sample_rate):
@@ -94,10 +105,11 @@ def update_audio_buffers(audio_chunk, original_buffer, resampled_buffer, buffer_
             buffer_start_frame = total_frames
         original_buffer = np.concatenate([original_buffer, audio_chunk])
     
-    resampled_chunk = resample_audio(audio_chunk, device_rate, sample_rate)
+    # Only the chunk being resampled and scored is converted to float32.
+    resampled_chunk = resample_audio(pcm16_to_float32(audio_chunk), device_rate, sample_rate)
     
     if resampled_chunk.size:
-        resampled_buffer = np.concatenate([resampled_buffer, resampled_chunk])
+        resampled_buffer = np.concatenate([resampled_buffer, float32_to_pcm16(resampled_chunk)])
     
     return original_buffer, resampled_buffer, resampled_chunk, buffer_start_frame
 
@@ -113,6 +125,24 @@ def detect_speech(resampled_chunk, vad_session, vad_state, vad_threshold):
         )
     return speech_prob
 
+def is_gated_silence(resampled_chunk, vad_state, energy_gate_dbfs):
+    if energy_gate_dbfs is None or len(resampled_chunk) < vad_state.window_size_samples:
+        return False
+    vad_audio = resampled_chunk[-vad_state.window_size_samples:]
+    return frame_energy_dbfs(vad_audio) < energy_gate_dbfs
+
+def gate_or_detect_speech(resampled_chunk, vad_session, vad_state, vad_threshold, energy_gate_dbfs,
+                          state, silence_threshold_frames):
+    if is_gated_silence(resampled_chunk, vad_state, energy_gate_dbfs):
+        state['skipped_frames'] += 1
+        state['gated_frame_count'] += 1
+        if state['gated_frame_count'] == silence_threshold_frames:
+            vad_state.reset()
+        return 0.0
+    
+    state['gated_frame_count'] = 0
+    return detect_speech(resampled_chunk, vad_session, vad_state, vad_threshold)
+
 def handle_speech_detection(speech_prob, vad_threshold, state, min_speech_frames):
     is_speech_now = speech_prob > vad_threshold
     speech_started = False
@@ -169,8 +199,8 @@ def save_chunk(audio_segment, chunk_count, recordings_dir, device_rate):
         return chunk_count
 
 def reset_buffers_and_state(resampled_buffer, original_buffer, vad_state, state, buffer_start_frame):
-    resampled_buffer = np.zeros(0, dtype=np.float32)
-    original_buffer = np.zeros(0, dtype=np.float32)
+    resampled_buffer = np.zeros(0, dtype=np.int16)
+    original_buffer = np.zeros(0, dtype=np.int16)
     buffer_start_frame = 0
     vad_state.reset()
     state['is_in_speech'] = False
@@ -221,11 +251,20 @@ def cleanup_audio_resources(stream, p):
     p.terminate()
 
 def realtime_vad_chunks(vad_threshold, min_speech_duration_ms, min_silence_duration_ms, silence_pad_ms, 
-                        sample_rate, chunk_duration_ms, model_path, model_url, model_dir, recordings_dir):
+                        sample_rate, chunk_duration_ms, model_path, model_url, model_dir, recordings_dir,
+                        energy_gate_dbfs=None, model_variant="default", session_preset="default",
+                        cache_optimized_graph=False):
     
     check_pyaudio_available()
     
-    vad_session, vad_state = initialize_vad_session(model_path, model_url, model_dir, sample_rate)
+    try:
+        vad_session, vad_state = initialize_vad_session(
+            model_path, model_url, model_dir, sample_rate,
+            model_variant, session_preset, cache_optimized_graph
+        )
+    except VADModelError as e:
+        print(e)
+        sys.exit(1)
     
     p = pyaudio.PyAudio()
     os.makedirs(recordings_dir, exist_ok=True)
@@ -255,7 +294,10 @@ def realtime_vad_chunks(vad_threshold, min_speech_duration_ms, min_silence_durat
                 
                 state['total_frames'] += 1
                 
-                speech_prob = detect_speech(resampled_chunk, vad_session, vad_state, vad_threshold)
+                speech_prob = gate_or_detect_speech(
+                    resampled_chunk, vad_session, vad_state, vad_threshold, energy_gate_dbfs,
+                    state, silence_threshold_frames
+                )
                 
                 is_speech_now, speech_started = handle_speech_detection(speech_prob, vad_threshold, state, min_speech_frames)
                 
@@ -274,6 +316,9 @@ def realtime_vad_chunks(vad_threshold, min_speech_duration_ms, min_silence_durat
                 
         except KeyboardInterrupt:
             print(f"\nTotal chunks saved: {state['chunk_count']}")
+            if energy_gate_dbfs is not None and state['total_frames'] > 0:
+                print(f"Energy gate skipped {state['skipped_frames']}/{state['total_frames']} frames "
+                      f"({100.0 * state['skipped_frames'] / state['total_frames']:.1f}%)")
             print(f"Output directory: {recordings_dir}")
         finally:
             cleanup_audio_resources(stream, p)
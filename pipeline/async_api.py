@@ -0,0 +1,149 @@
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import config
+from models.registry import get_vad_session, get_whisper_model
+from audio.loader import load_audio
+from audio.pcm import to_storage_dtype
+from vad.processor import extract_speech_segments, pack_segments
+from transcriber.processor import transcribe_segment
+from transcriber.governor import QualityGovernor
+from transcriber.features import compute_log_mel, slice_segment_features
+
+from src.vad_state import VADState
+
+class TranscriptionService:
+    def __init__(self, max_concurrent_streams=None, max_in_flight_segments=None,
+                 vad_workers=None, transcribe_workers=None):
+        self.max_concurrent_streams = max_concurrent_streams or config.ASYNC_CONFIG["max_concurrent_streams"]
+        self.max_in_flight_segments = max_in_flight_segments or config.ASYNC_CONFIG["max_in_flight_segments"]
+        self._vad_executor = ThreadPoolExecutor(
+            max_workers=vad_workers or config.ASYNC_CONFIG["vad_workers"],
+            thread_name_prefix="vad",
+        )
+        # CTranslate2 runs at most num_workers transcriptions in parallel; more threads would only queue.
+        self._transcribe_executor = ThreadPoolExecutor(
+            max_workers=transcribe_workers or config.WHISPER_CONFIG["num_workers"],
+            thread_name_prefix="whisper",
+        )
+        self._stream_slots = None
+        # Segments found by VAD but not yet transcribed, across all streams.
+        self.queued_segments = 0
+        self.governor = QualityGovernor() if config.GOVERNOR_CONFIG["enabled"] else None
+    
+    def _slots(self):
+        if self._stream_slots is None:
+            self._stream_slots = asyncio.Semaphore(self.max_concurrent_streams)
+        return self._stream_slots
+    
+    async def warm_up(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            loop.run_in_executor(self._vad_executor, get_vad_session),
+            loop.run_in_executor(self._transcribe_executor, get_whisper_model),
+        )
+    
+    async def _load(self, source):
+        if isinstance(source, np.ndarray):
+            return to_storage_dtype(source)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._vad_executor, load_audio, Path(source))
+    
+    def _segment_speech(self, audio):
+        vad_state = VADState(sampling_rate=config.SAMPLE_RATE)
+        segments = extract_speech_segments(audio, get_vad_session(), vad_state)
+        log_mel = None
+        if config.TRANSCRIBE_CONFIG["precompute_features"] and segments:
+            log_mel = compute_log_mel(audio, get_whisper_model())
+        return segments, log_mel
+    
+    def _transcribe(self, idx, segment, log_mel=None):
+        level, options = self.governor.current() if self.governor is not None else (None, None)
+        try:
+            segment_features = None
+            # Packed segments are not contiguous in the file, so their features are computed from the audio.
+            if log_mel is not None and 'packed_segments' not in segment:
+                segment_features = slice_segment_features(log_mel, segment['start'], segment['end'])
+            started = time.perf_counter()
+            transcription = transcribe_segment(
+                get_whisper_model(), segment['audio'], idx,
+                segment_features=segment_features, options=options
+            )
+            if self.governor is not None:
+                self.governor.observe(segment['duration'], time.perf_counter() - started,
+                                      self.queued_segments, level=level)
+        except Exception as e:
+            transcription = f"ERROR: {str(e)}"
+        
+        result = {
+            'segment': idx,
+            'start_time': segment['start']/config.SAMPLE_RATE,
+            'end_time': segment['end']/config.SAMPLE_RATE,
+            'duration': segment['duration'],
+            'transcription': transcription
+        }
+        if self.governor is not None:
+            result['quality_level'] = level
+        if 'packed_segments' in segment:
+            result['packed_segments'] = segment['packed_segments']
+        return result
+    
+    async def transcribe_stream(self, source):
+        loop = asyncio.get_running_loop()
+        async with self._slots():
+            audio = await self._load(source)
+            segments, log_mel = await loop.run_in_executor(self._vad_executor, self._segment_speech, audio)
+            del audio
+            
+            pending = deque()
+            next_idx = 0
+            unit_idx = 0
+            finished = 0
+            self.queued_segments += len(segments)
+            try:
+                while next_idx < len(segments) or pending:
+                    while next_idx < len(segments) and len(pending) < self.max_in_flight_segments:
+                        pack_seconds = self.governor.pack_seconds() if self.governor is not None else 0
+                        if pack_seconds:
+                            segment, count = pack_segments(segments, next_idx, pack_seconds,
+                                                           config.GOVERNOR_CONFIG["max_pack_gap_seconds"])
+                        else:
+                            segment, count = segments[next_idx], 1
+                        segments[next_idx:next_idx + count] = [None] * count
+                        next_idx += count
+                        unit_idx += 1
+                        future = self._transcribe_executor.submit(self._transcribe, unit_idx, segment, log_mel)
+                        pending.append((future, count))
+                    
+                    future, count = pending[0]
+                    result = await asyncio.wrap_future(future)
+                    pending.popleft()
+                    finished += count
+                    self.queued_segments -= count
+                    yield result
+            finally:
+                # Segments still queued behind other streams are dropped; one already
+                # inside CTranslate2 finishes in the background and is discarded.
+                for future, _ in pending:
+                    future.cancel()
+                self.queued_segments -= len(segments) - finished
+    
+    def close(self):
+        self._vad_executor.shutdown(wait=False, cancel_futures=True)
+        self._transcribe_executor.shutdown(wait=False, cancel_futures=True)
+
+_default_service = None
+
+def get_default_service():
+    global _default_service
+    if _default_service is None:
+        _default_service = TranscriptionService()
+    return _default_service
+
+async def transcribe_stream(source, service=None):
+    service = service or get_default_service()
+    async for segment_result in service.transcribe_stream(source):
+        yield segment_result
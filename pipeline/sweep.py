@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import resource
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Worker processes inherit a sys.path with models/vad ahead of the repo root, whose
+# config.py would shadow ours, so the root always goes first.
+if sys.path[:1] != [str(BASE_DIR)]:
+    sys.path.insert(0, str(BASE_DIR))
+
+import config
+from models.registry import get_vad_session, get_whisper_model
+from audio.loader import load_audio
+from vad.processor import extract_speech_segments
+from transcriber.processor import transcribe_segment
+from transcriber.features import compute_log_mel, slice_segment_features
+from transcriber.metrics import error_counts
+
+from src.vad_state import VADState
+
+SWEEPABLE = {
+    "WHISPER_CONFIG": config.WHISPER_CONFIG,
+    "TRANSCRIBE_CONFIG": config.TRANSCRIBE_CONFIG,
+    "VAD_CONFIG": config.VAD_CONFIG,
+}
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".m4a")
+
+def load_dataset(data_dir=None, manifest=None):
+    clips = []
+    if manifest is not None:
+        # One {"audio": ..., "text": ...} object per line; audio paths are relative to the manifest.
+        manifest = Path(manifest)
+        with open(manifest, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    clips.append((str(manifest.parent / item['audio']), item['text']))
+        return clips
+    
+    # Otherwise every audio file needs a reference transcript next to it with the same stem.
+    for path in sorted(Path(data_dir).iterdir()):
+        reference = path.with_suffix('.txt')
+        if path.suffix.lower() in AUDIO_EXTENSIONS and reference.exists():
+            clips.append((str(path), reference.read_text(encoding='utf-8')))
+    return clips
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def parse_grid(assignments):
+    grid = {}
+    for assignment in assignments:
+        name, _, values = assignment.partition("=")
+        grid[name.strip()] = [parse_value(value.strip()) for value in values.split(",")]
+    return grid
+
+def validate_grid(grid):
+    for name in grid:
+        section, _, key = name.partition(".")
+        if section not in SWEEPABLE or key not in SWEEPABLE[section]:
+            raise ValueError(f"Unknown setting {name!r}; use SECTION.key with SECTION one of {', '.join(SWEEPABLE)}")
+
+def expand_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def apply_settings(point):
+    for name, value in point.items():
+        section, _, key = name.partition(".")
+        SWEEPABLE[section][key] = value
+
+def transcribe_clip(audio):
+    vad_state = VADState(sampling_rate=config.SAMPLE_RATE)
+    segments = extract_speech_segments(audio, get_vad_session(), vad_state)
+    log_mel = None
+    if config.TRANSCRIBE_CONFIG["precompute_features"] and segments:
+        log_mel = compute_log_mel(audio, get_whisper_model())
+    
+    texts = []
+    for idx, segment in enumerate(segments, 1):
+        segment_features = None
+        if log_mel is not None:
+            segment_features = slice_segment_features(log_mel, segment['start'], segment['end'])
+        texts.append(transcribe_segment(get_whisper_model(), segment['audio'], idx, segment_features=segment_features))
+    return " ".join(texts), len(segments)
+
+def run_point(point, clips, model_dir=None):
+    # Each point runs in a fresh worker process, so the models are built with the
+    # point's settings and ru_maxrss is the peak of this point alone.
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    if model_dir is not None:
+        config.WHISPER_CONFIG["model_dir"] = Path(model_dir)
+    apply_settings(point)
+    
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            started = time.perf_counter()
+            get_vad_session()
+            get_whisper_model()
+            load_seconds = time.perf_counter() - started
+            
+            per_clip = []
+            for path, reference in clips:
+                audio = load_audio(Path(path))
+                started = time.perf_counter()
+                hypothesis, num_segments = transcribe_clip(audio)
+                latency = time.perf_counter() - started
+                
+                char_edits, char_total = error_counts(reference, hypothesis, "char")
+                word_edits, word_total = error_counts(reference, hypothesis, "word")
+                per_clip.append({
+                    'audio': path,
+                    'audio_seconds': len(audio) / config.SAMPLE_RATE,
+                    'latency': latency,
+                    'segments': num_segments,
+                    'char_edits': char_edits,
+                    'chars': char_total,
+                    'word_edits': word_edits,
+                    'words': word_total,
+                    'hypothesis': hypothesis,
+                })
+    except Exception as e:
+        return {'settings': point, 'error': f"{type(e).__name__}: {e}", 'log': log.getvalue()[-2000:]}
+    
+    latencies = np.array([clip['latency'] for clip in per_clip])
+    audio_seconds = sum(clip['audio_seconds'] for clip in per_clip)
+    return {
+        'settings': point,
+        'cer': sum(clip['char_edits'] for clip in per_clip) / max(sum(clip['chars'] for clip in per_clip), 1),
+        'wer': sum(clip['word_edits'] for clip in per_clip) / max(sum(clip['words'] for clip in per_clip), 1),
+        'rtf': float(latencies.sum()) / max(audio_seconds, 1e-6),
+        'latency_p50': float(np.percentile(latencies, 50)),
+        'latency_p95': float(np.percentile(latencies, 95)),
+        'load_seconds': load_seconds,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        'audio_seconds': audio_seconds,
+        'clips': per_clip,
+    }
+
+def mark_pareto_front(results):
+    # A point is on the front if no other point is at least as accurate and as fast, and better in one.
+    scored = [result for result in results if 'error' not in result]
+    for result in scored:
+        result['pareto'] = not any(
+            other['cer'] <= result['cer'] and other['rtf'] <= result['rtf']
+            and (other['cer'] < result['cer'] or other['rtf'] < result['rtf'])
+            for other in scored
+        )
+    return [result for result in scored if result['pareto']]
+
+def format_settings(settings):
+    return " ".join(f"{name.partition('.')[2]}={value}" for name, value in settings.items())
+
+def print_report(results):
+    print(f"\n{'='*60}")
+    print("📊 SWEEP RESULTS (sorted by CER)")
+    print(f"{'='*60}")
+    width = max(len(format_settings(result['settings'])) for result in results) + 2
+    print(f"{'':2}{'settings':<{width}}{'CER':>8}{'WER':>8}{'RTF':>8}{'p50 s':>8}{'p95 s':>8}{'RSS MB':>9}")
+    for result in sorted(results, key=lambda r: (r.get('cer', float('inf')), r.get('rtf', float('inf')))):
+        if 'error' in result:
+            print(f"❌ {format_settings(result['settings']):<{width}}{result['error']}")
+            continue
+        marker = "⭐" if result['pareto'] else "  "
+        print(f"{marker}{format_settings(result['settings']):<{width}}{result['cer']:>8.3f}{result['wer']:>8.3f}"
+              f"{result['rtf']:>8.3f}{result['latency_p50']:>8.2f}{result['latency_p95']:>8.2f}{result['max_rss_mb']:>9.0f}")
+    print("\n⭐ = on the CER/RTF Pareto front")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep pipeline settings and report accuracy against speed")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data-dir", help="Directory of audio clips, each with a same-named .txt reference")
+    source.add_argument("--manifest", help='JSONL file of {"audio": path, "text": reference} lines')
+    parser.add_argument("--grid", action="append", default=[], metavar="SECTION.key=v1,v2",
+                        help="Setting to sweep (repeatable); defaults to SWEEP_CONFIG['grid']")
+    parser.add_argument("--jobs", type=int, default=config.SWEEP_CONFIG["jobs"],
+                        help="Points run in parallel; keep jobs x cpu_threads within the machine's cores")
+    parser.add_argument("--model-dir", default=None, help="Local CTranslate2 Whisper model to use instead of WHISPER_CONFIG")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N clips")
+    parser.add_argument("--output", default=None, help="JSONL file for full results")
+    args = parser.parse_args()
+    
+    clips = load_dataset(args.data_dir, args.manifest)[:args.limit]
+    if not clips:
+        print("❌ No labelled clips found")
+        sys.exit(1)
+    
+    grid = parse_grid(args.grid) if args.grid else config.SWEEP_CONFIG["grid"]
+    try:
+        validate_grid(grid)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    points = expand_grid(grid)
+    
+    output = Path(args.output) if args.output else (
+        Path(config.SWEEP_CONFIG["output_dir"]) / f"sweep-{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    
+    print(f"🔬 Sweeping {len(points)} settings over {len(clips)} clips with {args.jobs} workers")
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs, max_tasks_per_child=1) as executor:
+        futures = [executor.submit(run_point, point, clips, args.model_dir) for point in points]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = result['error'] if 'error' in result else f"CER {result['cer']:.3f}, RTF {result['rtf']:.3f}"
+            print(f"   [{len(results)}/{len(points)}] {format_settings(result['settings'])}: {status}")
+    
+    mark_pareto_front(results)
+    with open(output, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    
+    print_report(results)
+    print(f"💾 Full results: {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+from pathlib import Path
+import config
+
+CHECKPOINT_VERSION = 2
+
+def settings_fingerprint():
+    # Resuming is only valid if segmentation and decoding would come out the same.
+    vad_keys = ("chunk_duration_ms", "threshold", "min_speech_duration_ms", "min_silence_duration_ms",
+                "silence_pad_ms", "energy_gate_dbfs", "model_variant")
+    return json.dumps({
+        'vad': {key: config.VAD_CONFIG.get(key) for key in vad_keys},
+        'transcribe': {key: value for key, value in config.TRANSCRIBE_CONFIG.items()},
+        'whisper_model': str(config.WHISPER_CONFIG["model_dir"]),
+    }, sort_keys=True, default=str)
+
+def new_run_id():
+    # Sorts by start time, so the latest run over a file is the largest id.
+    return f"{time.time_ns():020d}-{os.getpid()}"
+
+class Checkpoint:
+    def __init__(self, path, source_hash, num_samples, data=None):
+        self.path = Path(path)
+        self.vad_interval_seconds = config.CHECKPOINT_CONFIG["vad_interval_seconds"]
+        self.segment_interval = config.CHECKPOINT_CONFIG["segment_interval"]
+        self.data = data or {
+            'version': CHECKPOINT_VERSION,
+            'source_hash': source_hash,
+            'num_samples': num_samples,
+            'settings': settings_fingerprint(),
+            'run_id': new_run_id(),
+            'vad': None,
+            'results': [],
+        }
+        self._unsaved_results = 0
+    
+    @classmethod
+    def open(cls, source_hash, num_samples, checkpoint_dir=None):
+        checkpoint_dir = Path(checkpoint_dir or config.CHECKPOINT_CONFIG["checkpoint_dir"])
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = checkpoint_dir / f"{source_hash}.json"
+        
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   ⚠️  Ignoring unreadable checkpoint {path}: {e}")
+                data = None
+            
+            if data is not None and (
+                data.get('version') == CHECKPOINT_VERSION
+                and data.get('source_hash') == source_hash
+                and data.get('num_samples') == num_samples
+                and data.get('settings') == settings_fingerprint()
+            ):
+                return cls(path, source_hash, num_samples, data)
+            if data is not None:
+                print(f"   ⚠️  Checkpoint {path.name} was made with different settings, starting over")
+        
+        return cls(path, source_hash, num_samples)
+    
+    @property
+    def vad(self):
+        return self.data['vad']
+    
+    @property
+    def run_id(self):
+        # A resumed run keeps the id of the run it continues, so all of its results group together.
+        return self.data['run_id']
+    
+    @property
+    def results(self):
+        return {result['segment']: result for result in self.data['results']}
+    
+    def save(self):
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._unsaved_results = 0
+    
+    def save_vad(self, snapshot):
+        self.data['vad'] = snapshot
+        self.save()
+    
+    def add_result(self, result):
+        self.data['results'].append(result)
+        self._unsaved_results += 1
+        if self._unsaved_results >= self.segment_interval:
+            self.save()
+    
+    def complete(self):
+        if self._unsaved_results:
+            self.save()
+        if not config.CHECKPOINT_CONFIG["keep_completed"] and self.path.exists():
+            os.remove(self.path)
@@ -0,0 +1,363 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import config
+from audio.fingerprint import HOP_SIZE, bit_error_rate
+
+ENTRIES_FILE = "entries.bin"
+FINGERPRINTS_FILE = "fingerprints.bin"
+MERGED_POSTINGS = "postings.idx"
+LOCK_FILE = "index.lock"
+
+# Header: number of postings, number of entries they cover.
+HEADER_DTYPE = np.dtype('<u8')
+HEADER_SIZE = 2 * HEADER_DTYPE.itemsize
+
+KIND_CODES = {'file': 0, 'segment': 1}
+KIND_NAMES = {code: kind for kind, code in KIND_CODES.items()}
+
+# Entries only locate a recording: transcripts live in the result store under the same
+# source hash and sample range, so the table stays small and fixed-width.
+ENTRY_DTYPE = np.dtype([
+    ('kind', 'u1'),
+    ('fp_offset', '<u8'),
+    ('fp_length', '<u4'),
+    ('source_hash', 'S20'),
+    ('start', '<i8'),
+    ('end', '<i8'),
+    ('trim_start', '<i8'),
+])
+
+# All-zero and all-one sub-fingerprints come from silence and steady tones and match everything.
+UNINFORMATIVE_KEYS = (0x00000000, 0xFFFFFFFF)
+
+class _Postings:
+    def __init__(self, keys, entries, offsets, covered_entries):
+        self.keys = keys
+        self.entries = entries
+        self.offsets = offsets
+        self.covered_entries = covered_entries
+
+    def __len__(self):
+        return len(self.keys)
+
+def _empty_postings(covered_entries=0):
+    empty = np.zeros(0, dtype='<u4')
+    return _Postings(empty, empty, empty, covered_entries)
+
+def _read_entries(path):
+    # A crash mid-append can leave a partial trailing record; only whole records count.
+    count = os.path.getsize(path) // ENTRY_DTYPE.itemsize if os.path.exists(path) else 0
+    if count == 0:
+        return np.zeros(0, dtype=ENTRY_DTYPE)
+    return np.memmap(path, dtype=ENTRY_DTYPE, mode='r', shape=(count,))
+
+def _entry_record(kind, fp_offset, fp_length, source_hash, start=0, end=0, trim_start=0):
+    record = np.zeros(1, dtype=ENTRY_DTYPE)
+    record['kind'] = KIND_CODES[kind]
+    record['fp_offset'] = fp_offset
+    record['fp_length'] = fp_length
+    record['source_hash'] = bytes.fromhex(source_hash)
+    record['start'] = start
+    record['end'] = end
+    record['trim_start'] = trim_start
+    return record
+
+def _read_postings(path):
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+        return _empty_postings()
+    count, covered = np.fromfile(path, dtype=HEADER_DTYPE, count=2).tolist()
+    if count == 0:
+        return _empty_postings(covered)
+    # Keys, entry ids and offsets are stored as separate contiguous columns so
+    # searchsorted can binary-search the memory-mapped keys without copying them.
+    columns = [
+        np.memmap(path, dtype='<u4', mode='r', offset=HEADER_SIZE + i * 4 * count, shape=(count,))
+        for i in range(3)
+    ]
+    return _Postings(*columns, covered)
+
+def _build_postings(fingerprints, fp_offsets, fp_lengths, first_entry, stride):
+    # Every stride-th sub-fingerprint of every entry, gathered in one pass over the
+    # concatenated fingerprints rather than entry by entry.
+    fp_offsets = np.asarray(fp_offsets, dtype=np.int64)
+    counts = (np.asarray(fp_lengths, dtype=np.int64) + stride - 1) // stride
+    total = int(counts.sum())
+    if total == 0:
+        return _empty_postings()
+    within = (np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)) * stride
+    keys = np.asarray(fingerprints[np.repeat(fp_offsets, counts) + within], dtype='<u4')
+    entries = np.repeat(np.arange(first_entry, first_entry + len(counts), dtype=np.uint32), counts)
+
+    informative = ~np.isin(keys, UNINFORMATIVE_KEYS)
+    keys = keys[informative]
+    # Postings under one key are all read together, so their order does not matter.
+    order = np.argsort(keys)
+    return _Postings(keys[order], entries[informative][order], within[informative][order].astype('<u4'), 0)
+
+def _match(postings, keys, positions, max_postings_per_key):
+    if len(postings) == 0 or len(keys) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    left = np.searchsorted(postings.keys, keys, side='left')
+    right = np.searchsorted(postings.keys, keys, side='right')
+    counts = right - left
+    # A key shared by a large part of the archive says nothing about which entry matches.
+    counts[counts > max_postings_per_key] = 0
+
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.repeat(left, counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    hits = starts + within
+
+    entry_ids = np.asarray(postings.entries[hits], dtype=np.int64)
+    deltas = np.asarray(postings.offsets[hits], dtype=np.int64) - np.repeat(positions, counts)
+    return entry_ids, deltas
+
+def _aligned_error(query, stored, delta):
+    # stored[j] lines up with query[j - delta].
+    q_start = max(0, -delta)
+    s_start = max(0, delta)
+    overlap = min(len(query) - q_start, len(stored) - s_start)
+    if overlap <= 0:
+        return 1.0, 0
+    return bit_error_rate(query[q_start:q_start + overlap], stored[s_start:s_start + overlap]), overlap
+
+class FingerprintIndex:
+    def __init__(self, index_dir=None, index_stride=None):
+        self.index_dir = Path(index_dir or config.FINGERPRINT_CONFIG["index_dir"])
+        self.index_stride = index_stride or config.FINGERPRINT_CONFIG["index_stride"]
+        self.max_bit_error_rate = config.FINGERPRINT_CONFIG["max_bit_error_rate"]
+        self.min_coverage = config.FINGERPRINT_CONFIG["min_coverage"]
+        self.min_votes = config.FINGERPRINT_CONFIG["min_votes"]
+        self.max_candidates = config.FINGERPRINT_CONFIG["max_candidates"]
+        self.max_postings_per_key = config.FINGERPRINT_CONFIG["max_postings_per_key"]
+        self.min_frames = int(config.FINGERPRINT_CONFIG["min_segment_seconds"] * config.SAMPLE_RATE / HOP_SIZE)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        self._fingerprints = np.zeros(0, dtype='<u4')
+        self._merged = None
+        self._tail = None
+        self._refresh()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lock(self):
+        lock = open(self.index_dir / LOCK_FILE, 'w')
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        return lock
+
+    def _refresh(self):
+        # Other processes append to the same index; pick up the whole entries they have written since.
+        entries = _read_entries(self.index_dir / ENTRIES_FILE)
+        if len(entries) != len(self._entries):
+            self._entries = entries
+            self._tail = None
+
+        fingerprints_path = self.index_dir / FINGERPRINTS_FILE
+        count = os.path.getsize(fingerprints_path) // 4 if os.path.exists(fingerprints_path) else 0
+        if count > len(self._fingerprints):
+            self._fingerprints = np.memmap(fingerprints_path, dtype='<u4', mode='r', shape=(count,))
+
+        merged = _read_postings(self.index_dir / MERGED_POSTINGS)
+        if self._merged is None or merged.covered_entries != self._merged.covered_entries:
+            self._merged = merged
+            self._tail = None
+
+    def entry(self, entry_id):
+        record = self._entries[entry_id]
+        return {
+            'kind': KIND_NAMES[int(record['kind'])],
+            'source_hash': record['source_hash'].hex(),
+            'start': int(record['start']),
+            'end': int(record['end']),
+            'trim_start': int(record['trim_start']),
+        }
+
+    def fingerprint(self, entry_id):
+        record = self._entries[entry_id]
+        fp_offset = int(record['fp_offset'])
+        return self._fingerprints[fp_offset:fp_offset + int(record['fp_length'])]
+
+    def _tail_postings(self):
+        if self._tail is None:
+            first = self._merged.covered_entries
+            tail = self._entries[first:]
+            self._tail = _build_postings(self._fingerprints, tail['fp_offset'], tail['fp_length'],
+                                         first, self.index_stride)
+        return self._tail
+
+    def add(self, fingerprint, kind, source_hash, start=0, end=0, trim_start=0):
+        fingerprint = np.asarray(fingerprint, dtype='<u4')
+        with self._lock():
+            self._refresh()
+            fingerprints_path = self.index_dir / FINGERPRINTS_FILE
+            with open(fingerprints_path, 'ab') as f:
+                fp_offset = f.tell() // 4
+                f.write(fingerprint.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            # The entry goes in only after its fingerprint is on disk, and after any
+            # partial record a crash left behind is cut off.
+            record = _entry_record(kind, fp_offset, len(fingerprint), source_hash, start, end, trim_start)
+            with open(self.index_dir / ENTRIES_FILE, 'ab') as f:
+                size = f.tell()
+                if size % ENTRY_DTYPE.itemsize:
+                    f.truncate(size - size % ENTRY_DTYPE.itemsize)
+                f.write(record.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh()
+        return len(self._entries) - 1
+
+    def lookup(self, probes, kind=None, min_coverage=None):
+        min_coverage = self.min_coverage if min_coverage is None else min_coverage
+        self._refresh()
+        query = probes[0]
+        if len(query) < self.min_frames or len(self._entries) == 0:
+            return None
+
+        entry_ids = []
+        deltas = []
+        for probe in probes:
+            positions = np.arange(len(probe), dtype=np.int64)
+            informative = ~np.isin(probe, UNINFORMATIVE_KEYS)
+            for postings in (self._merged, self._tail_postings()):
+                found_ids, found_deltas = _match(postings, probe[informative], positions[informative],
+                                                 self.max_postings_per_key)
+                entry_ids.append(found_ids)
+                deltas.append(found_deltas)
+
+        entry_ids = np.concatenate(entry_ids)
+        deltas = np.concatenate(deltas)
+        if kind is not None:
+            keep = self._entries['kind'][entry_ids] == KIND_CODES[kind]
+            entry_ids = entry_ids[keep]
+            deltas = deltas[keep]
+        if len(entry_ids) == 0:
+            return None
+
+        # Each hit votes for an (entry, alignment) pair; true copies pile up on one alignment.
+        votes, counts = np.unique((entry_ids << 32) | (deltas + (1 << 31)), return_counts=True)
+        best = None
+        for idx in np.argsort(counts, kind='stable')[::-1][:self.max_candidates]:
+            if counts[idx] < self.min_votes:
+                break
+            entry_id = int(votes[idx] >> 32)
+            delta = int(votes[idx] & 0xFFFFFFFF) - (1 << 31)
+            stored = self.fingerprint(entry_id)
+
+            error, overlap = min(_aligned_error(probe, stored, delta) for probe in probes)
+            coverage = overlap / max(len(query), len(stored))
+            if error > self.max_bit_error_rate or coverage < min_coverage:
+                continue
+            if best is None or error < best['bit_error_rate']:
+                best = {
+                    'entry_id': entry_id,
+                    'entry': self.entry(entry_id),
+                    'bit_error_rate': error,
+                    'coverage': coverage,
+                    'offset_frames': delta,
+                    'votes': int(counts[idx]),
+                }
+        return best
+
+    def unmerged_count(self):
+        self._refresh()
+        return len(self._entries) - self._merged.covered_entries
+
+    def merge(self):
+        with self._lock():
+            self._refresh()
+            tail = self._tail_postings()
+            if len(self._entries) == self._merged.covered_entries:
+                return 0
+
+            keys = np.concatenate([self._merged.keys, tail.keys])
+            order = np.argsort(keys, kind='stable')
+            columns = [
+                keys[order],
+                np.concatenate([self._merged.entries, tail.entries])[order],
+                np.concatenate([self._merged.offsets, tail.offsets])[order],
+            ]
+            header = np.array([len(keys), len(self._entries)], dtype=HEADER_DTYPE)
+
+            tmp_path = self.index_dir / f"{MERGED_POSTINGS}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(header.tobytes())
+                for column in columns:
+                    f.write(column.astype('<u4').tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.index_dir / MERGED_POSTINGS)
+
+            added = len(self._entries) - self._merged.covered_entries
+            self._refresh()
+            return added
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio fingerprint index for duplicate detection")
+    parser.add_argument("--index-dir", default=str(config.FINGERPRINT_CONFIG["index_dir"]))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("merge", help="Fold recently added entries into the sorted postings file")
+    subparsers.add_parser("stats", help="Print index size")
+
+    query_parser = subparsers.add_parser("query", help="Find a near-duplicate of an audio file")
+    query_parser.add_argument("audio_file")
+
+    args = parser.parse_args()
+    index = FingerprintIndex(args.index_dir)
+
+    if args.command == "merge":
+        added = index.merge()
+        print(f"Merged {added} new entries into {index.index_dir / MERGED_POSTINGS}")
+        return
+
+    if args.command == "stats":
+        kinds = np.bincount(index._entries['kind'], minlength=len(KIND_CODES))
+        print(f"Entries: {len(index)} ({kinds[KIND_CODES['file']]} files, {kinds[KIND_CODES['segment']]} segments)")
+        print(f"Sub-fingerprints: {len(index._fingerprints)}")
+        print(f"Postings merged: {len(index._merged)}, entries awaiting merge: {index.unmerged_count()}")
+        return
+
+    from audio.loader import load_audio
+    from audio.fingerprint import trim_silence, compute_probes
+    from storage.result_store import ResultStore
+
+    audio = load_audio(Path(args.audio_file))
+    start, end = trim_silence(audio)
+    match = index.lookup(compute_probes(audio, start, end), kind='file')
+    if match is None:
+        print("No near-duplicate found")
+        return
+    records = ResultStore().lookup(match['entry']['source_hash'])
+    print(json.dumps({
+        'source': records[0]['source'] if records else None,
+        'source_hash': match['entry']['source_hash'],
+        'bit_error_rate': round(match['bit_error_rate'], 4),
+        'coverage': round(match['coverage'], 4),
+        'votes': match['votes'],
+    }, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import mmap
+import hashlib
+import argparse
+import numpy as np
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import config
+
+INDEX_DTYPE = np.dtype([
+    ('file_hash', 'S20'),
+    ('start', '<i8'),
+    ('end', '<i8'),
+    ('shard', '<u8'),
+    ('offset', '<u8'),
+    ('length', '<u4'),
+])
+
+MERGED_SHARDS_DTYPE = np.dtype([
+    ('shard', '<u8'),
+    ('count', '<u8'),
+])
+
+MERGED_INDEX = "merged.idx"
+MERGED_SHARDS = "merged.shards"
+LOCK_FILE = "merge.lock"
+
+def hash_file(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def _hash_key(file_hash):
+    if isinstance(file_hash, bytes) and len(file_hash) == 20:
+        return file_hash
+    return bytes.fromhex(file_hash)
+
+def _shard_name(shard_id):
+    return f"shard_{shard_id:016x}"
+
+def _read_index(path):
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    # A crash mid-append can leave a partial trailing record; only whole records count.
+    count = os.path.getsize(path) // INDEX_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    return np.memmap(path, dtype=INDEX_DTYPE, mode='r', shape=(count,))
+
+def _write_atomic(path, data):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _dedupe(entries):
+    if len(entries) == 0:
+        return entries
+    keys = np.stack([entries['shard'], entries['offset']], axis=1)
+    _, keep = np.unique(keys, axis=0, return_index=True)
+    return entries[np.sort(keep)]
+
+class ShardWriter:
+    def __init__(self, store_dir, shard_max_bytes, fsync=True):
+        self.store_dir = Path(store_dir)
+        self.shard_max_bytes = shard_max_bytes
+        self.fsync = fsync
+        self.data_file = None
+        self.index_file = None
+        self.records_written = 0
+        self._open_shard()
+
+    def _open_shard(self):
+        self.close()
+        if not self._reuse_shard():
+            self.shard_id = int.from_bytes(os.urandom(8), 'little')
+            self._open_files()
+
+    def _open_files(self):
+        name = _shard_name(self.shard_id)
+        self.data_file = open(self.store_dir / f"{name}.jsonl", 'ab')
+        self.index_file = open(self.store_dir / f"{name}.idx", 'ab')
+        if fcntl is not None:
+            fcntl.flock(self.data_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _reuse_shard(self):
+        # A shard with room left that no other writer holds is appended to, so the
+        # number of shards follows the number of concurrent writers, not of runs.
+        if fcntl is None:
+            return False
+        for path in sorted(self.store_dir.glob("shard_*.jsonl")):
+            if path.stat().st_size >= self.shard_max_bytes:
+                continue
+            self.shard_id = int(path.stem[len("shard_"):], 16)
+            try:
+                self._open_files()
+            except BlockingIOError:
+                self.close()
+                continue
+            # A crash mid-append can leave a partial index record; it has to go before
+            # new records are appended after it.
+            size = self.index_file.tell()
+            if size % INDEX_DTYPE.itemsize:
+                self.index_file.truncate(size - size % INDEX_DTYPE.itemsize)
+            return True
+        return False
+
+    def _sync(self, f):
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def append(self, file_hash, start, end, record):
+        if self.data_file.tell() >= self.shard_max_bytes:
+            self._open_shard()
+
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+        offset = self.data_file.tell()
+        self.data_file.write(line)
+        self._sync(self.data_file)
+
+        # The index entry is written only after its data is durable, so a
+        # record is either fully visible or not visible at all.
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry['file_hash'] = _hash_key(file_hash)
+        entry['start'] = start
+        entry['end'] = end
+        entry['shard'] = self.shard_id
+        entry['offset'] = offset
+        entry['length'] = len(line) - 1
+        self.index_file.write(entry.tobytes())
+        self._sync(self.index_file)
+        self.records_written += 1
+
+    def close(self):
+        for f in (self.data_file, self.index_file):
+            if f is not None:
+                f.close()
+        self.data_file = None
+        self.index_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class ResultStore:
+    def __init__(self, store_dir=None, shard_max_bytes=None, fsync=None):
+        self.store_dir = Path(store_dir or config.STORE_CONFIG["store_dir"])
+        self.shard_max_bytes = shard_max_bytes or config.STORE_CONFIG["shard_max_bytes"]
+        self.fsync = config.STORE_CONFIG["fsync"] if fsync is None else fsync
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._data_maps = {}
+
+    def open_writer(self):
+        return ShardWriter(self.store_dir, self.shard_max_bytes, self.fsync)
+
+    def _shard_counts(self):
+        counts = {}
+        with os.scandir(self.store_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith("shard_") and entry.name.endswith(".idx"):
+                    shard_id = int(entry.name[len("shard_"):-len(".idx")], 16)
+                    counts[shard_id] = entry.stat().st_size // INDEX_DTYPE.itemsize
+        return counts
+
+    def _merged_counts(self):
+        # Missing or stale after a crash between the two merge writes; the shards then
+        # look unmerged and their records are read again, which _dedupe absorbs.
+        path = self.store_dir / MERGED_SHARDS
+        if not path.exists():
+            return {}
+        table = np.fromfile(path, dtype=MERGED_SHARDS_DTYPE)
+        return dict(zip(table['shard'].tolist(), table['count'].tolist()))
+
+    def _unmerged_entries(self, merged_counts):
+        # Only shards that grew since the last merge are opened; the rest are covered
+        # by the merged index.
+        tails = []
+        shard_counts = self._shard_counts()
+        for shard_id, count in sorted(shard_counts.items()):
+            already = merged_counts.get(shard_id, 0)
+            if count > already:
+                entries = _read_index(self.store_dir / f"{_shard_name(shard_id)}.idx")
+                tails.append(np.array(entries[already:count]))
+        if not tails:
+            return np.zeros(0, dtype=INDEX_DTYPE), shard_counts
+        return np.concatenate(tails), shard_counts
+
+    def merge(self):
+        lock_path = self.store_dir / LOCK_FILE
+        with open(lock_path, 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+            merged = _read_index(self.store_dir / MERGED_INDEX)
+            new_entries, shard_counts = self._unmerged_entries(self._merged_counts())
+            if len(new_entries) == 0:
+                return 0
+
+            combined = _dedupe(np.concatenate([np.array(merged), new_entries]))
+            combined = np.sort(combined, order=('file_hash', 'start', 'shard', 'offset'))
+            _write_atomic(self.store_dir / MERGED_INDEX, combined.tobytes())
+
+            # Written after the index, so a crash in between only makes lookups read a
+            # few already-merged records again, which _dedupe drops.
+            table = np.zeros(len(shard_counts), dtype=MERGED_SHARDS_DTYPE)
+            table['shard'] = list(shard_counts)
+            table['count'] = list(shard_counts.values())
+            _write_atomic(self.store_dir / MERGED_SHARDS, table.tobytes())
+            return len(combined) - len(merged)
+
+    def _read_record(self, entry):
+        shard_id = int(entry['shard'])
+        data_map = self._data_maps.get(shard_id)
+        offset = int(entry['offset'])
+        length = int(entry['length'])
+        if data_map is None or len(data_map) < offset + length:
+            if data_map is not None:
+                data_map.close()
+            path = self.store_dir / f"{_shard_name(shard_id)}.jsonl"
+            with open(path, 'rb') as f:
+                data_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data_maps[shard_id] = data_map
+        return json.loads(data_map[offset:offset + length].decode('utf-8'))
+
+    def _find(self, file_hash):
+        key = _hash_key(file_hash)
+        merged = _read_index(self.store_dir / MERGED_INDEX)
+
+        matches = []
+        if len(merged) > 0:
+            hashes = merged['file_hash']
+            left = np.searchsorted(hashes, key, side='left')
+            right = np.searchsorted(hashes, key, side='right')
+            matches.append(np.array(merged[left:right]))
+
+        tail, _ = self._unmerged_entries(self._merged_counts())
+        if len(tail) > 0:
+            matches.append(tail[tail['file_hash'] == key])
+
+        if not matches:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        entries = _dedupe(np.concatenate(matches))
+        return np.sort(entries, order=('start', 'shard', 'offset'))
+
+    def lookup(self, file_hash, start=None, end=None):
+        entries = self._find(file_hash)
+        if start is not None:
+            entries = entries[entries['end'] > start]
+        if end is not None:
+            entries = entries[entries['start'] < end]
+        return [self._read_record(entry) for entry in entries]
+
+    def lookup_segment(self, file_hash, start, end):
+        entries = self._find(file_hash)
+        entries = entries[(entries['start'] == start) & (entries['end'] == end)]
+        return [self._read_record(entry) for entry in entries]
+
+    def has_file(self, file_hash):
+        return len(self._find(file_hash)) > 0
+
+    def close(self):
+        for data_map in self._data_maps.values():
+            data_map.close()
+        self._data_maps = {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded transcription result store")
+    parser.add_argument("--store-dir", default=str(config.STORE_CONFIG["store_dir"]))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("merge", help="Merge shard indexes into the sorted lookup index")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Print stored results for a source file")
+    lookup_parser.add_argument("source", help="Source audio path or its sha1 hash")
+    lookup_parser.add_argument("--start", type=float, default=None, help="Start time in seconds")
+    lookup_parser.add_argument("--end", type=float, default=None, help="End time in seconds")
+
+    args = parser.parse_args()
+    store = ResultStore(args.store_dir)
+
+    if args.command == "merge":
+        added = store.merge()
+        print(f"Merged {added} new records into {store.store_dir / MERGED_INDEX}")
+        return
+
+    file_hash = hash_file(args.source) if os.path.exists(args.source) else args.source
+    start = int(args.start * config.SAMPLE_RATE) if args.start is not None else None
+    end = int(args.end * config.SAMPLE_RATE) if args.end is not None else None
+    for record in store.lookup(file_hash, start, end):
+        print(json.dumps(record, ensure_ascii=False))
+    store.close()
+
+if __name__ == "__main__":
+    main()
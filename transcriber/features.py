@@ -0,0 +1,67 @@
+import copy
+import numpy as np
+import config
+from audio.pcm import to_float32
+
+LOG_MEL_FLOOR = -10.0
+
+class PrecomputedFeatureExtractor:
+    def __init__(self, feature_extractor, features):
+        self._feature_extractor = feature_extractor
+        self._features = features
+    
+    def __getattr__(self, name):
+        return getattr(self._feature_extractor, name)
+    
+    def __call__(self, waveform, padding=160, chunk_length=None):
+        return self._features
+
+def compute_log_mel(audio, whisper_model, block_frames=None):
+    feature_extractor = whisper_model.feature_extractor
+    n_fft = feature_extractor.n_fft
+    hop_length = feature_extractor.hop_length
+    mel_filters = np.asarray(feature_extractor.mel_filters, dtype=np.float32)
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+    block_frames = block_frames or config.TRANSCRIBE_CONFIG["feature_block_frames"]
+    
+    # Frame t is centred on sample t * hop_length, as in Whisper's centred STFT.
+    n_samples = len(audio)
+    n_frames = n_samples // hop_length + 1
+    half = n_fft // 2
+    log_mel = np.empty((mel_filters.shape[0], n_frames), dtype=np.float32)
+    
+    for t0 in range(0, n_frames, block_frames):
+        t1 = min(n_frames, t0 + block_frames)
+        lo = t0 * hop_length - half
+        hi = (t1 - 1) * hop_length + half
+        block = to_float32(audio[max(lo, 0):min(hi, n_samples)])
+        pad = (max(0, -lo), max(0, hi - n_samples))
+        if pad != (0, 0):
+            mode = 'reflect' if len(block) > max(pad) else 'constant'
+            block = np.pad(block, pad, mode=mode)
+        
+        frames = np.lib.stride_tricks.sliding_window_view(block, n_fft)[::hop_length]
+        magnitudes = np.abs(np.fft.rfft(frames * window, axis=-1)).astype(np.float32) ** 2
+        mel_spec = magnitudes @ mel_filters.T
+        log_mel[:, t0:t1] = np.log10(np.maximum(mel_spec, 1e-10)).T
+    
+    return log_mel
+
+def slice_segment_features(log_mel, start_sample, end_sample, hop_length=160):
+    # Same frame count the extractor yields for the segment audio with its default padding.
+    n_frames = (end_sample - start_sample) // hop_length + 1
+    first = int(round(start_sample / hop_length))
+    features = log_mel[:, first:first + n_frames]
+    if features.shape[1] < n_frames:
+        features = np.pad(features, ((0, 0), (0, n_frames - features.shape[1])), constant_values=LOG_MEL_FLOOR)
+    
+    # Whisper clamps and rescales relative to the maximum of each call's input.
+    features = np.maximum(features, features.max() - 8.0)
+    return (features + 4.0) / 4.0
+
+def with_precomputed_features(whisper_model, features):
+    # A shallow copy shares the CTranslate2 model and tokenizer, so concurrent
+    # callers each get their own extractor without reloading anything.
+    model = copy.copy(whisper_model)
+    model.feature_extractor = PrecomputedFeatureExtractor(whisper_model.feature_extractor, features)
+    return model
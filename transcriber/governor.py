@@ -0,0 +1,93 @@
+import json
+import time
+import threading
+from pathlib import Path
+import config
+
+DECODING_KEYS = ("beam_size", "best_of", "temperature")
+
+class QualityGovernor:
+    def __init__(self, levels=None, start_level=None, audit_log=None):
+        self.levels = levels or config.GOVERNOR_CONFIG["levels"]
+        self.level = config.GOVERNOR_CONFIG["start_level"] if start_level is None else start_level
+        self.level = min(max(self.level, 0), len(self.levels) - 1)
+        self.audit_log = audit_log if audit_log is not None else config.GOVERNOR_CONFIG["audit_log"]
+        
+        self.rtf_alpha = config.GOVERNOR_CONFIG["rtf_alpha"]
+        self.rtf_high = config.GOVERNOR_CONFIG["rtf_high"]
+        self.rtf_low = config.GOVERNOR_CONFIG["rtf_low"]
+        self.queue_high = config.GOVERNOR_CONFIG["queue_high"]
+        self.queue_low = config.GOVERNOR_CONFIG["queue_low"]
+        self.step_down_after = config.GOVERNOR_CONFIG["step_down_after"]
+        self.step_up_after = config.GOVERNOR_CONFIG["step_up_after"]
+        
+        self.rtf = None
+        self.observations = 0
+        self.segments_per_level = [0] * len(self.levels)
+        self.adjustments = []
+        self._since_change = 0
+        self._lock = threading.Lock()
+        
+        if self.audit_log:
+            Path(self.audit_log).parent.mkdir(parents=True, exist_ok=True)
+    
+    def current(self):
+        with self._lock:
+            settings = self.levels[self.level]
+            return self.level, {key: settings[key] for key in DECODING_KEYS if key in settings}
+    
+    def pack_seconds(self):
+        with self._lock:
+            return self.levels[self.level].get("pack_seconds", 0)
+    
+    def observe(self, audio_seconds, elapsed_seconds, queue_depth=0, level=None):
+        with self._lock:
+            if level is not None:
+                self.segments_per_level[level] += 1
+            # A result decoded before the last change says nothing about the current level.
+            if level is not None and level != self.level:
+                return self.level
+            
+            rtf = elapsed_seconds / max(audio_seconds, 1e-3)
+            self.rtf = rtf if self.rtf is None else self.rtf_alpha * rtf + (1.0 - self.rtf_alpha) * self.rtf
+            self.observations += 1
+            self._since_change += 1
+            
+            overload = None
+            if self.rtf > self.rtf_high:
+                overload = f"rtf {self.rtf:.2f} > {self.rtf_high}"
+            elif queue_depth > self.queue_high:
+                overload = f"queue depth {queue_depth} > {self.queue_high}"
+            
+            if overload is not None:
+                if self.level < len(self.levels) - 1 and self._since_change >= self.step_down_after:
+                    self._adjust(self.level + 1, overload, queue_depth)
+            elif self.level > 0 and self._since_change >= self.step_up_after:
+                # Stepping back up needs both a fast decoder and a short queue, and a
+                # longer run of evidence than stepping down, so the level does not flap.
+                if self.rtf < self.rtf_low and queue_depth <= self.queue_low:
+                    self._adjust(self.level - 1, f"rtf {self.rtf:.2f} < {self.rtf_low}, queue depth {queue_depth}",
+                                 queue_depth)
+            return self.level
+    
+    def _adjust(self, new_level, reason, queue_depth):
+        adjustment = {
+            'time': time.time(),
+            'from_level': self.level,
+            'to_level': new_level,
+            'reason': reason,
+            'rtf': round(self.rtf, 4),
+            'queue_depth': queue_depth,
+            'observations': self.observations,
+            'settings': self.levels[new_level],
+        }
+        self.adjustments.append(adjustment)
+        if self.audit_log:
+            with open(self.audit_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(adjustment) + "\n")
+        
+        direction = "⬇️" if new_level > self.level else "⬆️"
+        print(f"   {direction}  Quality level {self.level} -> {new_level}: {reason}")
+        self.level = new_level
+        self.rtf = None
+        self._since_change = 0
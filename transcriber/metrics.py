@@ -0,0 +1,63 @@
+import re
+import numpy as np
+
+# Harakat, Quranic annotation marks and the superscript alef carry no letters of their own.
+DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+TATWEEL = "\u0640"
+PUNCTUATION = re.compile(r"[^\w\s]|_")
+LETTER_VARIANTS = str.maketrans({
+    "\u0622": "\u0627",  # alef with madda
+    "\u0623": "\u0627",  # alef with hamza above
+    "\u0625": "\u0627",  # alef with hamza below
+    "\u0671": "\u0627",  # alef wasla
+    "\u0649": "\u064A",  # alef maqsura -> yeh
+    "\u0629": "\u0647",  # teh marbuta -> heh
+})
+
+def normalize_arabic(text):
+    text = DIACRITICS.sub("", text).replace(TATWEEL, "")
+    text = text.translate(LETTER_VARIANTS)
+    text = PUNCTUATION.sub(" ", text)
+    return " ".join(text.split())
+
+def edit_distance(reference, hypothesis):
+    if len(reference) == 0:
+        return len(hypothesis)
+    if len(hypothesis) == 0:
+        return len(reference)
+    
+    vocabulary = {}
+    ref = np.array([vocabulary.setdefault(token, len(vocabulary)) for token in reference])
+    hyp = np.array([vocabulary.setdefault(token, len(vocabulary)) for token in hypothesis])
+    
+    # One Levenshtein row per reference token. Substitutions and deletions come from the
+    # previous row; insertions run along the row, which a running minimum resolves at once.
+    columns = np.arange(len(hyp) + 1)
+    previous = columns.copy()
+    for i, token in enumerate(ref, 1):
+        current = np.empty_like(previous)
+        current[0] = i
+        current[1:] = np.minimum(previous[1:] + 1, previous[:-1] + (hyp != token))
+        previous = np.minimum.accumulate(current - columns) + columns
+    return int(previous[-1])
+
+def error_counts(reference, hypothesis, unit="char"):
+    reference = normalize_arabic(reference)
+    hypothesis = normalize_arabic(hypothesis)
+    if unit == "word":
+        reference = reference.split()
+        hypothesis = hypothesis.split()
+    else:
+        # Spaces are dropped so word-boundary slips are not counted twice against the CER.
+        reference = reference.replace(" ", "")
+        hypothesis = hypothesis.replace(" ", "")
+    return edit_distance(reference, hypothesis), len(reference)
+
+def error_rate(references, hypotheses, unit="char"):
+    edits = 0
+    total = 0
+    for reference, hypothesis in zip(references, hypotheses):
+        clip_edits, clip_total = error_counts(reference, hypothesis, unit)
+        edits += clip_edits
+        total += clip_total
+    return edits / max(total, 1)
@@ -2,21 +2,36 @@ import os
 import soundfile as sf
 from pathlib import Path
 import config
+from transcriber.features import with_precomputed_features
+from audio.pcm import to_float32
 
-def transcribe_segment(whisper_model, segment_audio, segment_idx, temp_dir):
-    temp_audio_path = temp_dir / f"chunk_{segment_idx:03d}.wav"
-    sf.write(str(temp_audio_path), segment_audio, config.SAMPLE_RATE)
+def transcribe_segment(whisper_model, segment_audio, segment_idx, temp_dir=None, segment_features=None, options=None):
+    if segment_features is not None:
+        whisper_model = with_precomputed_features(whisper_model, segment_features)
+    
+    # Without a temp_dir the array is passed straight to the model, which keeps
+    # concurrent callers from sharing chunk file names. With precomputed features the
+    # audio is not decoded for features at all, so no file is written either.
+    temp_audio_path = None
+    model_input = to_float32(segment_audio)
+    if temp_dir is not None and segment_features is None:
+        temp_audio_path = temp_dir / f"chunk_{segment_idx:03d}.wav"
+        sf.write(str(temp_audio_path), segment_audio, config.SAMPLE_RATE)
+        model_input = str(temp_audio_path)
+    
+    # options overrides TRANSCRIBE_CONFIG per call, e.g. the quality governor's current level.
+    settings = {**config.TRANSCRIBE_CONFIG, **(options or {})}
     
     segments_whisper, info = whisper_model.transcribe(
-        str(temp_audio_path),
-        beam_size=config.TRANSCRIBE_CONFIG["beam_size"],
-        language=config.TRANSCRIBE_CONFIG["language"],
-        task=config.TRANSCRIBE_CONFIG["task"],
-        max_new_tokens=config.TRANSCRIBE_CONFIG["max_new_tokens"],
-        condition_on_previous_text=config.TRANSCRIBE_CONFIG["condition_on_previous_text"],
-        best_of=config.TRANSCRIBE_CONFIG["best_of"],
-        temperature=config.TRANSCRIBE_CONFIG["temperature"],
-        vad_filter=config.TRANSCRIBE_CONFIG["vad_filter"]
+        model_input,
+        beam_size=settings["beam_size"],
+        language=settings["language"],
+        task=settings["task"],
+        max_new_tokens=settings["max_new_tokens"],
+        condition_on_previous_text=settings["condition_on_previous_text"],
+        best_of=settings["best_of"],
+        temperature=settings["temperature"],
+        vad_filter=settings["vad_filter"]
     )
     
     segment_texts = []
@@ -25,7 +40,8 @@ def transcribe_segment(whisper_model, segment_audio, segment_idx, temp_dir):
     
     transcription = " ".join(segment_texts)
     
-    os.remove(temp_audio_path)
+    if temp_audio_path is not None:
+        os.remove(temp_audio_path)
     
     return transcription
 
@@ -10,9 +10,66 @@ if str(VAD_DIR) not in sys.path:
     sys.path.insert(0, str(VAD_DIR))
 
 from src.vad_state import VADState
-from src.processor import process_audio_chunk_onnx
+from src.processor import process_audio_chunk_onnx, frame_energy_dbfs
 
-def extract_speech_segments(audio, vad_session, vad_state):
+def compute_energy_gate(audio, chunk_size, gate_dbfs, block_frames=4096):
+    n_frames = (len(audio) + chunk_size - 1) // chunk_size
+    gated = np.zeros(n_frames, dtype=bool)
+    if gate_dbfs is None:
+        return gated
+    
+    full_frames = len(audio) // chunk_size
+    for block_start in range(0, full_frames, block_frames):
+        block_end = min(full_frames, block_start + block_frames)
+        block = audio[block_start * chunk_size:block_end * chunk_size].reshape(-1, chunk_size)
+        gated[block_start:block_end] = frame_energy_dbfs(block) < gate_dbfs
+    
+    if full_frames < n_frames:
+        tail = np.zeros(chunk_size, dtype=audio.dtype)
+        tail[:len(audio) - full_frames * chunk_size] = audio[full_frames * chunk_size:]
+        gated[full_frames] = frame_energy_dbfs(tail) < gate_dbfs
+    
+    return gated
+
+def make_segment(audio, start_sample, end_sample):
+    segment_audio = audio[start_sample:end_sample]
+    return {
+        'start': start_sample,
+        'end': end_sample,
+        'audio': segment_audio.copy(),
+        'duration': len(segment_audio) / config.SAMPLE_RATE
+    }
+
+def pack_segments(segments, first, max_seconds, max_gap_seconds):
+    # Neighbouring short segments are decoded as one input, trading per-segment
+    # timestamps for fewer decoder calls. Returns the packed segment and how many it used.
+    group = [segments[first]]
+    duration = segments[first]['duration']
+    for segment in segments[first + 1:]:
+        gap = (segment['start'] - group[-1]['end']) / config.SAMPLE_RATE
+        if gap > max_gap_seconds or duration + segment['duration'] > max_seconds:
+            break
+        group.append(segment)
+        duration += segment['duration']
+    
+    if len(group) == 1:
+        return group[0], 1
+    
+    parts = [group[0]['audio']]
+    for previous, segment in zip(group, group[1:]):
+        # The silence pad can run into the next segment; that audio is only kept once.
+        overlap = max(0, previous['end'] - segment['start'])
+        parts.append(segment['audio'][overlap:])
+    packed_audio = np.concatenate(parts)
+    return {
+        'start': group[0]['start'],
+        'end': group[-1]['end'],
+        'audio': packed_audio,
+        'duration': len(packed_audio) / config.SAMPLE_RATE,
+        'packed_segments': len(group)
+    }, len(group)
+
+def extract_speech_segments(audio, vad_session, vad_state, checkpoint=None):
     print(f"\n🎤 Processing audio with VAD...")
     print(f"   Audio length: {len(audio)} samples ({len(audio)/config.SAMPLE_RATE:.2f} seconds)")
     
@@ -24,6 +81,7 @@ def extract_speech_segments(audio, vad_session, vad_state):
     min_speech_duration_ms = config.VAD_CONFIG["min_speech_duration_ms"]
     silence_pad_ms = config.VAD_CONFIG["silence_pad_ms"]
     vad_threshold = config.VAD_CONFIG["threshold"]
+    energy_gate_dbfs = config.VAD_CONFIG["energy_gate_dbfs"]
     
     silence_threshold_frames = max(1, int((min_silence_duration_ms + chunk_duration_ms - 1) // chunk_duration_ms))
     min_speech_frames = max(1, int((min_speech_duration_ms + chunk_duration_ms - 1) // chunk_duration_ms))
@@ -33,6 +91,12 @@ def extract_speech_segments(audio, vad_session, vad_state):
     print(f"   Min speech frames: {min_speech_frames}")
     print(f"   Silence threshold frames: {silence_threshold_frames}")
     print(f"   Silence pad: {silence_pad_samples} samples")
+    if energy_gate_dbfs is not None:
+        print(f"   Energy gate: {energy_gate_dbfs} dBFS")
+    
+    gated_frames = compute_energy_gate(audio, chunk_size, energy_gate_dbfs)
+    gated_run = 0
+    skipped_frames = 0
     
     total_frames = 0
     speech_frame_count = 0
@@ -45,12 +109,61 @@ def extract_speech_segments(audio, vad_session, vad_state):
     silence_periods = []
     current_silence_start = None
     
-    for i in range(0, len(audio), chunk_size):
+    def vad_snapshot(complete):
+        return {
+            'complete': complete,
+            'total_frames': total_frames,
+            'speech_frame_count': speech_frame_count,
+            'silent_frame_count': silent_frame_count,
+            'is_in_speech': is_in_speech,
+            'speech_start_frame': speech_start_frame,
+            'last_speech_frame': last_speech_frame,
+            'current_silence_start': current_silence_start,
+            'gated_run': gated_run,
+            'skipped_frames': skipped_frames,
+            'vad_state': vad_state.state.tolist(),
+            'segments': [[segment['start'], segment['end']] for segment in segments],
+            'silence_periods': [list(period) for period in silence_periods],
+        }
+    
+    checkpoint_interval_frames = None
+    if checkpoint is not None:
+        checkpoint_interval_frames = max(1, int(checkpoint.vad_interval_seconds * 1000 // chunk_duration_ms))
+        saved = checkpoint.vad
+        if saved is not None:
+            segments = [make_segment(audio, start, end) for start, end in saved['segments']]
+            if saved['complete']:
+                print(f"   ♻️  Restored {len(segments)} speech segments from checkpoint")
+                return segments
+            
+            total_frames = saved['total_frames']
+            speech_frame_count = saved['speech_frame_count']
+            silent_frame_count = saved['silent_frame_count']
+            is_in_speech = saved['is_in_speech']
+            speech_start_frame = saved['speech_start_frame']
+            last_speech_frame = saved['last_speech_frame']
+            current_silence_start = saved['current_silence_start']
+            gated_run = saved['gated_run']
+            skipped_frames = saved['skipped_frames']
+            silence_periods = [tuple(period) for period in saved['silence_periods']]
+            vad_state.state = np.array(saved['vad_state'], dtype=np.float32)
+            print(f"   ♻️  Resuming VAD from checkpoint at {total_frames * chunk_size / config.SAMPLE_RATE:.2f}s")
+    
+    for i in range(total_frames * chunk_size, len(audio), chunk_size):
         chunk = audio[i:i+chunk_size]
         if len(chunk) < chunk_size:
             chunk = np.pad(chunk, (0, chunk_size - len(chunk)))
         
-        if len(chunk) >= vad_state.window_size_samples:
+        if gated_frames[total_frames]:
+            speech_prob = 0.0
+            skipped_frames += 1
+            gated_run += 1
+            # Silero's recurrent state is not advanced on skipped frames, so after a
+            # long gated stretch start fresh, as if the silence had been fed through.
+            if gated_run == silence_threshold_frames:
+                vad_state.reset()
+        elif len(chunk) >= vad_state.window_size_samples:
+            gated_run = 0
             vad_audio = chunk[-vad_state.window_size_samples:] if len(chunk) > vad_state.window_size_samples else chunk
             speech_prob = process_audio_chunk_onnx(vad_audio, vad_session, vad_state)
         else:
@@ -89,15 +202,8 @@ def extract_speech_segments(audio, vad_session, vad_state):
                     start_sample = speech_start_frame * frames_per_buffer
                     end_sample = min(len(audio), (last_speech_frame + 1) * frames_per_buffer + silence_pad_samples)
                     
-                    segment_audio = audio[start_sample:end_sample]
-                    
-                    if len(segment_audio) > 0:
-                        segments.append({
-                            'start': start_sample,
-                            'end': end_sample,
-                            'audio': segment_audio.copy(),
-                            'duration': len(segment_audio) / config.SAMPLE_RATE
-                        })
+                    if end_sample > start_sample:
+                        segments.append(make_segment(audio, start_sample, end_sample))
                 
                 vad_state.reset()
                 is_in_speech = False
@@ -107,22 +213,23 @@ def extract_speech_segments(audio, vad_session, vad_state):
                 last_speech_frame = None
         
         total_frames += 1
+        
+        if checkpoint_interval_frames is not None and total_frames % checkpoint_interval_frames == 0:
+            checkpoint.save_vad(vad_snapshot(complete=False))
     
     if is_in_speech and speech_start_frame is not None and last_speech_frame is not None:
         start_sample = speech_start_frame * frames_per_buffer
         end_sample = min(len(audio), (last_speech_frame + 1) * frames_per_buffer + silence_pad_samples)
         
-        segment_audio = audio[start_sample:end_sample]
-        
-        if len(segment_audio) > 0:
-            segments.append({
-                'start': start_sample,
-                'end': end_sample,
-                'audio': segment_audio.copy(),
-                'duration': len(segment_audio) / config.SAMPLE_RATE
-            })
+        if end_sample > start_sample:
+            segments.append(make_segment(audio, start_sample, end_sample))
+    
+    if checkpoint is not None:
+        checkpoint.save_vad(vad_snapshot(complete=True))
     
     print(f"   Processed {total_frames} chunks")
+    if energy_gate_dbfs is not None and total_frames > 0:
+        print(f"   Energy gate skipped {skipped_frames}/{total_frames} chunks ({100.0 * skipped_frames / total_frames:.1f}%)")
     print(f"   ✅ Detected {len(segments)} speech segments")
     
     if len(segments) <= 1: